@@ -0,0 +1,82 @@
+"""
+精确求解基准：在 TABLE3_3 + 默认先修图上比较 solver="exact" 与 ACO 的耗时与解质量。
+
+用法：
+  python scripts/bench_exact.py                          # 20 个随机学生，ACO 30 蚂蚁 × 80 轮
+  python scripts/bench_exact.py --students 50 --ants 50 --iters 120 --engine batch
+  python scripts/bench_exact.py --ants 5 --iters 10 --local_search iter_best
+
+质量差 gap = L_aco - L_exact（≥ 0，越小越好）；exact 的 L 是可证明最优的下界。
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+
+# 允许直接 python scripts/*.py 运行：把项目根目录加入 sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from upkst.types import StudentState, UPKSTParams
+from upkst.datasets.paper_table3_3 import make_points_from_table
+from upkst.datasets.prereq_default import apply_prereqs
+from upkst.point_table import PointTable
+from upkst.exact import min_penalty_order
+from upkst.runner import run_upkst
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--students", type=int, default=20)
+    ap.add_argument("--ants", type=int, default=30)
+    ap.add_argument("--iters", type=int, default=80)
+    ap.add_argument("--engine", default="numpy", help="ACO 构造引擎：numpy | batch | python")
+    ap.add_argument("--local_search", default="none", help="ACO 的局部搜索：none | iter_best | final")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    points = make_points_from_table(base_unit=6.0)
+    points = apply_prereqs(points, {kp.name: kid for kid, kp in points.items()})
+    table = PointTable.from_points(points)
+    _, _, n_states = min_penalty_order(table.graph, table.d)
+    print(f"n={table.n}  down-sets={n_states}  (2^n={2 ** table.n})")
+
+    aco = UPKSTParams(k=0.35, T=120.0, t_min=3.0, alpha=1.0, beta=2.0, beta_jump=0.8, rho=0.15,
+                      n_ants=args.ants, n_iters=args.iters, seed=7, engine=args.engine,
+                      local_search=args.local_search)
+    exact = replace(aco, solver="exact", local_search="none")
+
+    rng = np.random.default_rng(args.seed)
+    t_aco, t_exact, gaps = [], [], []
+    for _ in range(args.students):
+        student_table = table.with_mastery(rng.uniform(0.1, 0.9, table.n))
+        student = StudentState(A=float(np.exp(rng.normal(0.0, 0.3))))
+        s_aco, dt_aco = timed(lambda: run_upkst(student_table, student, aco))
+        s_exact, dt_exact = timed(lambda: run_upkst(student_table, student, exact))
+        assert s_exact.stop_reason == "exact"
+        t_aco.append(dt_aco)
+        t_exact.append(dt_exact)
+        gaps.append(s_aco.L - s_exact.L)
+
+    gaps = np.array(gaps)
+    print(f"{'solver':>8}  {'mean(s)':>10}  {'total(s)':>10}")
+    print(f"{'aco':>8}  {np.mean(t_aco):>10.4f}  {np.sum(t_aco):>10.3f}")
+    print(f"{'exact':>8}  {np.mean(t_exact):>10.4f}  {np.sum(t_exact):>10.3f}")
+    print(f"speedup: {np.sum(t_aco) / np.sum(t_exact):.1f}x")
+    print(f"gap L_aco - L_exact: mean={gaps.mean():.4f}  max={gaps.max():.4f}  "
+          f"ACO optimal in {int(np.sum(gaps <= 1e-9))}/{len(gaps)}")
+
+
+if __name__ == "__main__":
+    main()
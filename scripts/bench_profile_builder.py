@@ -0,0 +1,48 @@
+"""
+画像构建基准：在合成 raw_long 表上计时 build_mastery / build_ability。
+
+用法：
+  python scripts/bench_profile_builder.py                    # 默认 1M 与 10M 行
+  python scripts/bench_profile_builder.py --rows 100000 1000000 --repeat 3
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+# 允许直接 python scripts/*.py 运行：把项目根目录加入 sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from upkst.profile_builder import build_mastery, build_ability, ProfileParams
+from upkst.datasets.synthetic import make_raw_long_rows
+
+
+def bench(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    params = ProfileParams()
+    print(f"{'rows':>12}  {'build_mastery(s)':>16}  {'build_ability(s)':>16}")
+    for n_rows in args.rows:
+        df = make_raw_long_rows(n_rows)
+        t_m = bench(lambda: build_mastery(df, params), args.repeat)
+        t_a = bench(lambda: build_ability(df, params), args.repeat)
+        print(f"{len(df):>12}  {t_m:>16.3f}  {t_a:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+UPKST 基准套件：在合成数据上计时热点函数，结果写成 JSON，可与保存的基线比对。
+
+计时项（键名形如 "<项目>/n=<知识点数>" 或 "<项目>/rows=<行数>"）：
+  construct_path_np      numpy 引擎构造一条路径
+  construct_paths_batch  batch 引擎构造一轮（--ants 条）路径
+  construct_path_python  python 参考引擎构造一条路径（只测 n <= --python_max_n）
+  allocate_time_kkt      全体知识点的 KKT 时间分配
+  deposit_pheromone      一轮（--ants 条）路径的信息素挥发 + 沉积（update_pheromone 的数组实现）
+  deposit_pheromone_lazy 同上，惰性挥发（LazyTau）
+  run_upkst              端到端求解（--ants 蚂蚁 × --iters 轮）
+  build_mastery / build_ability  画像构建（合成 raw_long）
+
+课程为随机分层先修 DAG（upkst.datasets.synthetic，17 → 500 个知识点），raw_long 为合成考试表（10k → 10M 行）；全部固定种子、在本进程内运行。
+每项取 --repeat 次中的最快值（秒/次）。
+
+用法：
+  python scripts/bench_upkst.py                                   # 完整套件，写 output/bench/bench_upkst.json
+  python scripts/bench_upkst.py --quick --out /tmp/base.json      # 小规模
+  python scripts/bench_upkst.py --quick --compare /tmp/base.json  # 与基线比对，变慢超过阈值时退出码为 1
+  python scripts/bench_upkst.py --only kkt run_upkst              # 只跑键名包含给定子串的项目
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# 允许直接 python scripts/*.py 运行：把项目根目录加入 sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from upkst.types import StudentState, UPKSTParams
+from upkst.point_table import PointTable
+from upkst.heuristics import build_eta, build_eta_vector
+from upkst.aco import construct_path, construct_path_np, construct_paths_batch, transition_weights
+from upkst.kkt_time import allocate_time_kkt_batch
+from upkst.pheromone import deposit_pheromone
+from upkst.lazy_tau import LazyTau
+from upkst.profile_builder import ProfileParams, build_mastery, build_ability
+from upkst.runner import run_upkst
+from upkst.rng import ant_streams, draw_uniforms
+from upkst.datasets.synthetic import make_layered_dag, make_raw_long_rows
+
+
+DEFAULT_OUT = os.path.join(ROOT, "output", "bench", "bench_upkst.json")
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    """每次至少跑满 0.2s（timeit.autorange），取 repeat 次中最快的单次耗时"""
+    timer = timeit.Timer(fn)
+    number, total = timer.autorange()
+    best = total / number
+    for _ in range(repeat - 1):
+        best = min(best, timer.timeit(number) / number)
+    return best
+
+
+def bench_engine(n: int, args, results: Dict[str, float]) -> None:
+    points = make_layered_dag(n, seed=args.seed)
+    table = PointTable.from_points(points)
+    graph = table.graph
+    params = UPKSTParams(T=max(90.0, 3.0 * n), n_ants=args.ants, n_iters=args.iters, seed=args.seed)
+    student = StudentState(A=1.0)
+
+    tau = np.full((n + 1, n), params.tau0)
+    weights = transition_weights(tau, build_eta_vector(table, params.eps), params)
+    streams = ant_streams(params.seed, args.ants)
+
+    cases = {
+        "construct_path_np": lambda: construct_path_np(graph, weights, streams[0]),
+        "construct_paths_batch": lambda: construct_paths_batch(graph, weights, args.ants,
+                                                               uniforms=draw_uniforms(streams, n)),
+        "allocate_time_kkt": lambda: allocate_time_kkt_batch(table.w, table.mastery, table.d, 1.0, params),
+        "run_upkst": lambda: run_upkst(table, student, params),
+    }
+    if n <= args.python_max_n:
+        eta = build_eta(points, params.eps)
+        py_rng = random.Random(params.seed)
+        cases["construct_path_python"] = lambda: construct_path(points, tau, graph.idx, eta, params, py_rng, graph=graph)
+
+    paths = construct_paths_batch(graph, weights, args.ants, uniforms=draw_uniforms(streams, n))
+    g = np.random.default_rng(args.seed).uniform(0.1, 1.0, paths.shape)
+    Q = np.random.default_rng(args.seed + 1).uniform(1.0, 10.0, args.ants)
+    tau_dep = tau.copy()
+    cases["deposit_pheromone"] = lambda: deposit_pheromone(tau_dep, paths, g, Q, params)
+    tau_lazy = LazyTau(tau, params.tau_min, params.tau_max)
+    cases["deposit_pheromone_lazy"] = lambda: deposit_pheromone(tau_lazy, paths, g, Q, params)
+
+    for name, fn in cases.items():
+        key = f"{name}/n={n}"
+        if _selected(key, args.only):
+            results[key] = measure(fn, args.repeat)
+            print(f"{key:<40} {results[key]:>12.6f} s")
+
+
+def bench_profiles(n_rows: int, args, results: Dict[str, float]) -> None:
+    keys = [f"{name}/rows={n_rows}" for name in ("build_mastery", "build_ability")]
+    if not any(_selected(k, args.only) for k in keys):
+        return
+    df = make_raw_long_rows(n_rows, seed=args.seed)
+    params = ProfileParams()
+    for key, fn in zip(keys, (lambda: build_mastery(df, params), lambda: build_ability(df, params))):
+        if _selected(key, args.only):
+            results[key] = measure(fn, args.repeat)
+            print(f"{key:<40} {results[key]:>12.6f} s")
+
+
+def _selected(key: str, only: List[str]) -> bool:
+    return not only or any(s in key for s in only)
+
+
+def compare(results: Dict[str, float], baseline_path: str, threshold: float) -> bool:
+    """打印与基线的比值；返回是否存在变慢超过 threshold 倍的项目"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    regressed = False
+    print(f"\n{'benchmark':<40} {'baseline(s)':>12} {'current(s)':>12} {'ratio':>8}")
+    for key, cur in results.items():
+        if key not in base:
+            print(f"{key:<40} {'-':>12} {cur:>12.6f} {'new':>8}")
+            continue
+        ratio = cur / base[key] if base[key] > 0 else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        regressed |= bool(flag)
+        print(f"{key:<40} {base[key]:>12.6f} {cur:>12.6f} {ratio:>8.2f}{flag}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[17, 50, 100, 200, 500], help="课程知识点数")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000],
+                    help="raw_long 行数")
+    ap.add_argument("--quick", action="store_true", help="小规模：--sizes 17 100 --rows 10000 100000")
+    ap.add_argument("--ants", type=int, default=30)
+    ap.add_argument("--iters", type=int, default=10)
+    ap.add_argument("--python_max_n", type=int, default=200, help="python 参考引擎只测到该规模")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", nargs="*", default=[], help="只跑键名包含这些子串的项目")
+    ap.add_argument("--out", default=DEFAULT_OUT, help="结果 JSON 路径")
+    ap.add_argument("--compare", default=None, help="基线 JSON；给定时打印比值")
+    ap.add_argument("--threshold", type=float, default=1.2, help="比值超过该值视为变慢")
+    args = ap.parse_args()
+    if args.quick:
+        args.sizes, args.rows = [17, 100], [10_000, 100_000]
+
+    results: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    for n in args.sizes:
+        bench_engine(n, args, results)
+    for n_rows in args.rows:
+        bench_profiles(n_rows, args, results)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+            "wall_s": time.perf_counter() - t0,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("Saved:", os.path.abspath(args.out))
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
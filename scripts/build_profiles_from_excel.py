@@ -4,14 +4,17 @@
 - 整体学习能力 A_s（>0）
 
 默认输入：data/students/students.xlsx 的 raw_long sheet。
+--chunksize N：对 CSV 输入分块两遍扫描（内存与行数无关），用于超出内存的 raw_long 表。
+--save_state：额外保存增量更新所需的 profile_state.npz（见 scripts/update_profiles.py）。
 
 默认输出到：output/profiles/
+  - profiles.npz（掌握度矩阵 + 能力向量，run_batch_students.py 的首选输入）
   - mastery_long.csv
   - mastery_wide.csv
   - ability.csv
   - debug_exam_kp_stats.csv
-  - profiles.xlsx
   - config_used.json
+  - profiles.xlsx（仅 --xlsx 时导出，供人工查看的报表）
 """
 from __future__ import annotations
 import argparse
@@ -26,7 +29,9 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from upkst.profile_builder import load_long_table, build_mastery, build_ability, ProfileParams
+from upkst.profile_builder import load_long_table, build_mastery, build_ability, build_profiles_chunked, ProfileParams
+from upkst.profile_state import state_from_long, save_profile_state
+from upkst.profile_store import PROFILE_STORE_NAME, profiles_to_matrix, save_profile_matrix
 
 
 DEFAULT_INPUT = os.path.join(ROOT, "data", "students", "students.xlsx")
@@ -42,15 +47,26 @@ def main():
     ap.add_argument("--decay_lambda", type=float, default=0.003)
     ap.add_argument("--kappa", type=float, default=0.3)
     ap.add_argument("--fill_mastery", type=float, default=0.5)
+    ap.add_argument("--chunksize", type=int, default=0, help="CSV 分块行数（0 为一次性读入）")
+    ap.add_argument("--save_state", action="store_true", help="保存增量更新状态 profile_state.npz")
+    ap.add_argument("--xlsx", action="store_true", help="额外导出 profiles.xlsx 报表（openpyxl，较慢）")
     args = ap.parse_args()
+    if args.save_state and args.chunksize > 0:
+        ap.error("--save_state 需要一次性读入（不能与 --chunksize 同时使用）")
 
     os.makedirs(args.out_dir, exist_ok=True)
     params = ProfileParams(gamma=args.gamma, decay_lambda=args.decay_lambda, kappa=args.kappa, fill_mastery=args.fill_mastery)
 
-    df = load_long_table(args.input, sheet=args.sheet)
+    if args.chunksize > 0:
+        mastery_long, debug_stats, ability = build_profiles_chunked(args.input, params, chunksize=args.chunksize)
+    else:
+        df = load_long_table(args.input, sheet=args.sheet)
+        mastery_long, debug_stats = build_mastery(df, params)
+        ability = build_ability(df, params)
+        if args.save_state:
+            save_profile_state(state_from_long(df, params), os.path.join(args.out_dir, "profile_state.npz"))
 
-    mastery_long, debug_stats = build_mastery(df, params)
-    ability = build_ability(df, params)
+    save_profile_matrix(profiles_to_matrix(mastery_long, ability), os.path.join(args.out_dir, PROFILE_STORE_NAME))
 
     mastery_wide = mastery_long.pivot_table(index="student_id", columns="kp_name", values="mastery", aggfunc="mean").reset_index()
 
@@ -59,17 +75,19 @@ def main():
     ability.to_csv(os.path.join(args.out_dir, "ability.csv"), index=False, encoding="utf-8-sig")
     debug_stats.to_csv(os.path.join(args.out_dir, "debug_exam_kp_stats.csv"), index=False, encoding="utf-8-sig")
 
-    out_xlsx = os.path.join(args.out_dir, "profiles.xlsx")
-    with pd.ExcelWriter(out_xlsx, engine="openpyxl") as w:
-        mastery_long.to_excel(w, index=False, sheet_name="mastery_long")
-        mastery_wide.to_excel(w, index=False, sheet_name="mastery_wide")
-        ability.to_excel(w, index=False, sheet_name="ability")
-        debug_stats.to_excel(w, index=False, sheet_name="debug_exam_kp_stats")
+    if args.xlsx:
+        out_xlsx = os.path.join(args.out_dir, "profiles.xlsx")
+        with pd.ExcelWriter(out_xlsx, engine="openpyxl") as w:
+            mastery_long.to_excel(w, index=False, sheet_name="mastery_long")
+            mastery_wide.to_excel(w, index=False, sheet_name="mastery_wide")
+            ability.to_excel(w, index=False, sheet_name="ability")
+            debug_stats.to_excel(w, index=False, sheet_name="debug_exam_kp_stats")
 
     with open(os.path.join(args.out_dir, "config_used.json"), "w", encoding="utf-8") as f:
         json.dump({
             "input": args.input,
             "sheet": args.sheet,
+            "chunksize": args.chunksize,
             "params": params.__dict__,
         }, f, ensure_ascii=False, indent=2)
 
@@ -1,14 +1,29 @@
 """
-批量运行UPKST：读取 build_profiles_from_excel.py 的输出（mastery_long + ability），
+批量运行UPKST：读取 build_profiles_from_excel.py 的输出（优先 profiles.npz，否则 mastery_long + ability CSV），
 对每个学生生成最优路径 P 与时间分配 t，并导出结果。
 
 默认输入：output/profiles/
 默认输出：output/results/
+
+--workers N：用 N 个进程并行求解（学生之间相互独立）。
+  - 基础知识点表（PointTable，含先修图）在进程初始化时传给各 worker 一次，
+    任务只携带 (sid, A_s, 掌握度向量)，切换学生只替换掌握度向量；
+  - 每个学生的随机种子由 --seed 与 student_id 确定性派生，结果与 worker 数、调度顺序无关；
+  - 结果按学生顺序流式写入三个 CSV。
+--trace_dir DIR：为每个学生写一份逐轮遥测 JSONL（DIR/<student_id>.jsonl）。
+--warm_start：用信息素缓存热启动（见 upkst/pheromone_cache.py）：每个学生从画像签名最近的
+  已求解学生的 τ 出发，命中时只跑 --warm_iters 轮。缓存在各 worker 进程内独立维护，
+  因此开启后结果取决于学生的处理顺序与 worker 数。
 """
 from __future__ import annotations
 import argparse
+import csv
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import numpy as np
 import pandas as pd
 
 # 允许直接 python scripts/*.py 运行：把项目根目录加入 sys.path
@@ -18,7 +33,12 @@ if ROOT not in sys.path:
 
 from upkst.types import StudentState, UPKSTParams
 from upkst.runner import run_upkst
-from upkst.datasets.paper_table3_3 import make_points_from_table, override_masteries
+from upkst.point_table import PointTable
+from upkst.telemetry import JsonlTraceWriter
+from upkst.pheromone_cache import PheromoneCache
+from upkst.rng import student_seed
+from upkst.profile_store import PROFILE_STORE_NAME, ProfileMatrix, load_profile_matrix, profiles_to_matrix
+from upkst.datasets.paper_table3_3 import make_points_from_table
 from upkst.datasets.prereq_default import apply_prereqs
 
 
@@ -26,100 +46,182 @@ DEFAULT_PROFILES_DIR = os.path.join(ROOT, "output", "profiles")
 DEFAULT_OUT_DIR = os.path.join(ROOT, "output", "results")
 
 
+SUMMARY_COLS = ["student_id", "A_s", "U", "L", "Q", "lambda", "path_kids", "path_names"]
+TIME_COLS = ["student_id", "kid", "kp_name", "t", "w", "d", "mastery"]
+EDGE_COLS = ["student_id", "from_kid", "to_kid", "from_name", "to_name"]
+
+# worker 进程内共享的只读数据（由 _init_worker 设置一次）
+_TABLE = None
+_PARAMS = None
+_TRACE_DIR = None
+_TAU_CACHE = None
+_WARM_ITERS = 0
+
+
+def _init_worker(table, params, trace_dir=None, tau_cache=None, warm_iters=0):
+    global _TABLE, _PARAMS, _TRACE_DIR, _TAU_CACHE, _WARM_ITERS
+    _TABLE = table
+    _PARAMS = params
+    _TRACE_DIR = trace_dir
+    _TAU_CACHE = tau_cache
+    _WARM_ITERS = warm_iters
+
+
+def _solve_student(task):
+    sid, A_s, m_vec = task
+    # 缺失的知识点沿用基础表的掌握度
+    table = _TABLE.with_mastery(np.where(np.isnan(m_vec), _TABLE.mastery, m_vec))
+    student = StudentState(A=A_s)
+    params = replace(_PARAMS, seed=student_seed(_PARAMS.seed, sid))
+
+    tau_init = None
+    if _TAU_CACHE is not None:
+        tau_init = _TAU_CACHE.get(table.mastery, A_s)
+        if tau_init is not None and _WARM_ITERS > 0:
+            params = replace(params, n_iters=_WARM_ITERS)
+
+    if _TRACE_DIR:
+        with JsonlTraceWriter(os.path.join(_TRACE_DIR, f"{sid}.jsonl"), student_id=str(sid)) as tr:
+            best = run_upkst(table, student, params, observer=tr, tau_init=tau_init)
+    else:
+        best = run_upkst(table, student, params, tau_init=tau_init)
+
+    if _TAU_CACHE is not None and best.tau is not None:
+        _TAU_CACHE.put(table.mastery, A_s, best.tau)
+
+    idx = table.idx
+    names = table.names
+    path_names = [names[idx[i]] for i in best.path]
+    summary_row = {
+        "student_id": sid,
+        "A_s": A_s,
+        "U": best.U,
+        "L": best.L,
+        "Q": best.Q,
+        "lambda": best.lam,
+        "path_kids": "->".join(map(str, best.path)),
+        "path_names": "->".join(path_names),
+    }
+
+    time_rows = []
+    for i in best.path:
+        c = idx[i]
+        time_rows.append({
+            "student_id": sid,
+            "kid": i,
+            "kp_name": names[c],
+            "t": best.t_map[i],
+            "w": float(table.w[c]),
+            "d": float(table.d[c]),
+            "mastery": float(table.mastery[c]),
+        })
+
+    edge_rows = []
+    for a, b in zip(best.path[:-1], best.path[1:]):
+        edge_rows.append({
+            "student_id": sid,
+            "from_kid": a,
+            "to_kid": b,
+            "from_name": names[idx[a]],
+            "to_name": names[idx[b]],
+        })
+
+    return summary_row, time_rows, edge_rows
+
+
+def load_profiles(profiles_dir: str, fmt: str) -> ProfileMatrix:
+    npz = os.path.join(profiles_dir, PROFILE_STORE_NAME)
+    if fmt == "npz" or (fmt == "auto" and os.path.exists(npz)):
+        return load_profile_matrix(npz)
+    mastery_long = pd.read_csv(os.path.join(profiles_dir, "mastery_long.csv"), encoding="utf-8-sig")
+    ability = pd.read_csv(os.path.join(profiles_dir, "ability.csv"), encoding="utf-8-sig")
+    return profiles_to_matrix(mastery_long, ability)
+
+
+def _iter_tasks(profiles: ProfileMatrix, table: PointTable):
+    # 画像列 → 知识点表列；画像中没有的知识点记为 NaN（由 worker 回填）
+    cols = pd.Index(profiles.kp_names).get_indexer(list(table.names))
+    for row, sid in enumerate(profiles.student_ids.tolist()):
+        m = np.where(cols >= 0, profiles.mastery[row, cols], np.nan)
+        yield sid, float(profiles.A_s[row]), m
+
+
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--profiles_dir", default=DEFAULT_PROFILES_DIR, help="profiles目录（含 mastery_long.csv, ability.csv）")
+    ap.add_argument("--profiles_dir", default=DEFAULT_PROFILES_DIR, help="profiles目录（含 profiles.npz 或 mastery_long.csv, ability.csv）")
+    ap.add_argument("--profiles_format", choices=["auto", "npz", "csv"], default="auto",
+                    help="画像格式：auto 优先 profiles.npz，不存在时读 CSV")
     ap.add_argument("--out_dir", default=DEFAULT_OUT_DIR, help="输出目录")
     ap.add_argument("--T", type=float, default=90.0, help="3个月，90天")
     ap.add_argument("--t_min", type=float, default=2.0, help="复习的最小天数")
     ap.add_argument("--n_ants", type=int, default=30)
     ap.add_argument("--n_iters", type=int, default=60)
     ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--workers", type=int, default=1, help="并行进程数（1 为单进程）")
+    ap.add_argument("--trace_dir", default=None, help="逐轮遥测 JSONL 输出目录（默认不输出）")
+    ap.add_argument("--warm_start", action="store_true", help="用相近画像的信息素热启动")
+    ap.add_argument("--warm_iters", type=int, default=15, help="热启动命中时的迭代轮数（0 表示沿用 --n_iters）")
+    ap.add_argument("--warm_cache_size", type=int, default=64, help="每个进程缓存的信息素矩阵数")
+    ap.add_argument("--warm_mastery_step", type=float, default=0.1, help="画像签名中掌握度的量化步长")
+    ap.add_argument("--warm_ability_step", type=float, default=0.1, help="画像签名中 A_s 的量化步长")
+    ap.add_argument("--warm_smoothing", type=float, default=0.5,
+                    help="缓存 τ 向 tau0 收缩的强度（0 原样沿用，1 等同冷启动）")
     args = ap.parse_args()
 
     os.makedirs(args.out_dir, exist_ok=True)
+    if args.trace_dir:
+        os.makedirs(args.trace_dir, exist_ok=True)
 
-    mastery_long = pd.read_csv(os.path.join(args.profiles_dir, "mastery_long.csv"), encoding="utf-8-sig")
-    ability = pd.read_csv(os.path.join(args.profiles_dir, "ability.csv"), encoding="utf-8-sig")
+    profiles = load_profiles(args.profiles_dir, args.profiles_format)
 
     base_points = make_points_from_table(masteries={}, base_unit=6.0, normalize_weights=False)
     name_to_id = {kp.name: kid for kid, kp in base_points.items()}
     base_points = apply_prereqs(base_points, name_to_id)
-
-    by_student = mastery_long.groupby("student_id")
-
-    summary_rows = []
-    time_rows = []
-    edge_rows = []
-
-    for _, row in ability.iterrows():
-        sid = row["student_id"]
-        A_s = float(row["A_s"])
-
-        if sid in by_student.groups:
-            sub = by_student.get_group(sid)
-            m_map = {r["kp_name"]: float(r["mastery"]) for _, r in sub.iterrows()}
+    table = PointTable.from_points(base_points)
+
+    params = UPKSTParams(
+        k=0.35,
+        T=args.T,
+        t_min=args.t_min,
+        alpha=1.0,
+        beta=2.0,
+        beta_jump=0.8,
+        rho=0.15,
+        n_ants=args.n_ants,
+        n_iters=args.n_iters,
+        seed=args.seed,
+    )
+
+    tasks = _iter_tasks(profiles, table)
+    tau_cache = PheromoneCache(args.warm_cache_size, args.warm_mastery_step, args.warm_ability_step,
+                               smoothing=args.warm_smoothing, tau0=params.tau0) if args.warm_start else None
+    init_args = (table, params, args.trace_dir, tau_cache, args.warm_iters)
+
+    with open(os.path.join(args.out_dir, "best_plan_summary.csv"), "w", newline="", encoding="utf-8-sig") as f_sum, \
+            open(os.path.join(args.out_dir, "best_time_long.csv"), "w", newline="", encoding="utf-8-sig") as f_time, \
+            open(os.path.join(args.out_dir, "best_path_edges.csv"), "w", newline="", encoding="utf-8-sig") as f_edge:
+        w_sum = csv.DictWriter(f_sum, fieldnames=SUMMARY_COLS)
+        w_time = csv.DictWriter(f_time, fieldnames=TIME_COLS)
+        w_edge = csv.DictWriter(f_edge, fieldnames=EDGE_COLS)
+        for w in (w_sum, w_time, w_edge):
+            w.writeheader()
+
+        def write(result):
+            summary_row, time_rows, edge_rows = result
+            w_sum.writerow(summary_row)
+            w_time.writerows(time_rows)
+            w_edge.writerows(edge_rows)
+
+        if args.workers <= 1:
+            _init_worker(*init_args)
+            for task in tasks:
+                write(_solve_student(task))
         else:
-            m_map = {}
-
-        points = override_masteries(base_points, m_map)
-        student = StudentState(A=A_s)
-
-        params = UPKSTParams(
-            k=0.35,
-            T=args.T,
-            t_min=args.t_min,
-            alpha=1.0,
-            beta=2.0,
-            beta_jump=0.8,
-            rho=0.15,
-            n_ants=args.n_ants,
-            n_iters=args.n_iters,
-            seed=args.seed,
-        )
-
-        best = run_upkst(points, student, params)
-
-        path_names = [points[i].name for i in best.path]
-        summary_rows.append({
-            "student_id": sid,
-            "A_s": A_s,
-            "U": best.U,
-            "L": best.L,
-            "Q": best.Q,
-            "lambda": best.lam,
-            "path_kids": "->".join(map(str, best.path)),
-            "path_names": "->".join(path_names),
-        })
-
-        for i in best.path:
-            kp = points[i]
-            time_rows.append({
-                "student_id": sid,
-                "kid": i,
-                "kp_name": kp.name,
-                "t": best.t_map[i],
-                "w": kp.w,
-                "d": kp.d,
-                "mastery": kp.mastery,
-            })
-
-        for a, b in zip(best.path[:-1], best.path[1:]):
-            edge_rows.append({
-                "student_id": sid,
-                "from_kid": a,
-                "to_kid": b,
-                "from_name": points[a].name,
-                "to_name": points[b].name,
-            })
-
-    summary_df = pd.DataFrame(summary_rows)
-    time_df = pd.DataFrame(time_rows)
-    edge_df = pd.DataFrame(edge_rows)
-
-    summary_df.to_csv(os.path.join(args.out_dir, "best_plan_summary.csv"), index=False, encoding="utf-8-sig")
-    time_df.to_csv(os.path.join(args.out_dir, "best_time_long.csv"), index=False, encoding="utf-8-sig")
-    edge_df.to_csv(os.path.join(args.out_dir, "best_path_edges.csv"), index=False, encoding="utf-8-sig")
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                     initargs=init_args) as ex:
+                # map 按提交顺序返回，保证输出按学生顺序
+                for result in ex.map(_solve_student, tasks, chunksize=4):
+                    write(result)
 
     print("OK. Results written to:", os.path.abspath(args.out_dir))
 
@@ -1,6 +1,8 @@
 # 单学生快速跑通UPKST（不需要profiles），用于确认算法可运行。
+# --colonies K (K > 1)：改用岛屿模型（run_upkst_islands），K 个蚁群分摊蚂蚁，--workers 个进程并行。
 
 from __future__ import annotations
+import argparse
 import os
 import sys
 
@@ -12,10 +14,18 @@ if PROJECT_ROOT not in sys.path:
 from upkst.types import StudentState, UPKSTParams
 from upkst.datasets.paper_table3_3 import make_points_from_table
 from upkst.datasets.prereq_default import apply_prereqs
-from upkst.runner import run_upkst
+from upkst.runner import run_upkst, run_upkst_islands
+from upkst.telemetry import print_progress
 
 
 def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--colonies", type=int, default=1, help="蚁群数（>1 时使用岛屿模型）")
+    ap.add_argument("--migrate_every", type=int, default=10, help="蚁群间交换最优路径的间隔轮数")
+    ap.add_argument("--blend", type=float, default=0.0, help="交换时信息素向各群均值混合的比例")
+    ap.add_argument("--workers", type=int, default=None, help="岛屿模型的进程数（缺省为 CPU 数）")
+    args = ap.parse_args()
+
     student = StudentState(A=1.0)
     masteries = {
         "一元函数导数及其应用": 0.3,
@@ -32,7 +42,11 @@ def main():
         rho=0.15, n_ants=50, n_iters=120, seed=7
     )
 
-    best = run_upkst(points, student, params)
+    if args.colonies > 1:
+        best = run_upkst_islands(points, student, params, n_colonies=args.colonies,
+                                 migrate_every=args.migrate_every, blend=args.blend, workers=args.workers)
+    else:
+        best = run_upkst(points, student, params, observer=print_progress)
     print("\n===== BEST SOLUTION =====")
     print("Path (name):", [points[i].name for i in best.path])
     print("lambda:", best.lam)
@@ -0,0 +1,74 @@
+"""
+增量更新学生画像：把一次新考试并入已保存的画像状态，而不是重跑全部历史。
+
+用法：
+  # 先用 build_profiles_from_excel.py --save_state 生成 output/profiles/profile_state.npz
+  python scripts/update_profiles.py --new_exam data/students/G3_S2_month_sim.xlsx
+
+新考试可以是长表（含 kp_name 列）或宽表（每个知识点一列分数，如 G3_S2_month_sim.xlsx）。
+输出：更新后的 profile_state.npz、profiles.npz、mastery_long.csv、mastery_wide.csv、ability.csv（覆盖写入 --out_dir）。
+debug_exam_kp_stats.csv 与 profiles.xlsx 需要完整历史才能重建，更新后会从 --out_dir 删除，避免目录内容互相矛盾。
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+# 允许直接 python scripts/*.py 运行：把项目根目录加入 sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from upkst.profile_state import load_profile_state, update_profiles, profiles_from_state, save_profile_state
+from upkst.profile_store import PROFILE_STORE_NAME, profiles_to_matrix, save_profile_matrix
+
+
+DEFAULT_PROFILES_DIR = os.path.join(ROOT, "output", "profiles")
+ID_COLS = ["student_id", "exam_id", "exam_date", "exam_weight"]
+
+
+def read_exam(path: str, sheet, full_score: float) -> pd.DataFrame:
+    if path.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path, sheet_name=sheet, engine="openpyxl")
+    else:
+        df = pd.read_csv(path, encoding="utf-8-sig")
+    if "kp_name" in df.columns:
+        return df
+    # 宽表：每个知识点一列分数
+    long = df.melt(id_vars=ID_COLS, var_name="kp_name", value_name="score").dropna(subset=["score"])
+    long["full_score"] = full_score
+    return long
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--new_exam", required=True, help="新考试的 Excel/CSV（长表或宽表）")
+    ap.add_argument("--sheet", default=0, help="Excel sheet（默认第一个）")
+    ap.add_argument("--full_score", type=float, default=100.0, help="宽表分数的满分")
+    ap.add_argument("--out_dir", default=DEFAULT_PROFILES_DIR, help="画像目录（读取并更新 profile_state.npz；其中的 debug_exam_kp_stats.csv、profiles.xlsx 会被删除）")
+    args = ap.parse_args()
+
+    state_path = os.path.join(args.out_dir, "profile_state.npz")
+    state = load_profile_state(state_path)
+    state = update_profiles(state, read_exam(args.new_exam, args.sheet, args.full_score))
+    save_profile_state(state, state_path)
+
+    mastery_long, ability = profiles_from_state(state)
+    save_profile_matrix(profiles_to_matrix(mastery_long, ability), os.path.join(args.out_dir, PROFILE_STORE_NAME))
+    mastery_wide = mastery_long.pivot_table(index="student_id", columns="kp_name", values="mastery", aggfunc="mean").reset_index()
+    mastery_long.to_csv(os.path.join(args.out_dir, "mastery_long.csv"), index=False, encoding="utf-8-sig")
+    mastery_wide.to_csv(os.path.join(args.out_dir, "mastery_wide.csv"), index=False, encoding="utf-8-sig")
+    ability.to_csv(os.path.join(args.out_dir, "ability.csv"), index=False, encoding="utf-8-sig")
+    # 只能由完整历史生成的输出：删除旧文件而不是留下过期内容
+    for name in ("debug_exam_kp_stats.csv", "profiles.xlsx"):
+        stale = os.path.join(args.out_dir, name)
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    print("OK. Profiles updated to:", state.ref_date.date(), "exams:", len(state.exam_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,31 @@
 蚁群构造路径：式(2-5)(2-6)
 - C_r：满足先修约束的候选集合
 - 转移概率 p_ij ∝ τ_ij^alpha * η_j^beta
+
+给定预编译的先修图（graph.PrereqGraph）时，C_r 由剩余入度计数器增量维护；
+候选按 kid 升序排列，与 feasible_candidates 对按 kid 升序建立的 points 结果一致。
+
+两种构造引擎：
+- "numpy"（默认）：每轮迭代先算一次转移权重矩阵 W = τ^alpha · η^beta（(n+1)×n），
+  每步取 W 当前行按可行掩码置零，用 cumsum + searchsorted 从该蚂蚁的 numpy 子流抽样（见 rng.py）；
+- "python"：逐元素计算权重 + random.Random 轮盘赌，作为可复现的参考实现。
+
+"batch" 引擎（construct_paths_batch）让一轮的全部蚂蚁同步前进：每条路径恰好 n 步，
+每步用 (n_ants × n) 的可行掩码/剩余入度矩阵、按各蚂蚁当前点取 W 的行，
+一次批量逆 CDF 抽样得到所有蚂蚁的下一个点；一轮只需 O(n) 次 numpy 调用。
+两者使用同样的抽样规则，给定同样的均匀数时构造出的路径逐位一致。
+两者都接受稀疏信息素（sparse_tau.SparseTau）得到的转移权重，结果与稠密模式相同。
 """
 from __future__ import annotations
-from typing import Dict, List, Set
+from bisect import insort
+from typing import Dict, List, Optional, Set, Union
 import random
 import numpy as np
 
 from .types import KnowledgePoint, UPKSTParams
+from .graph import PrereqGraph
+from .sparse_tau import SparseTau
+from .lazy_tau import LazyTau
 
 
 def feasible_candidates(points: Dict[int, KnowledgePoint], visited: Set[int]) -> List[int]:
@@ -40,11 +58,16 @@ def construct_path(points: Dict[int, KnowledgePoint],
                    idx: Dict[int, int],
                    eta: Dict[int, float],
                    params: UPKSTParams,
-                   rng: random.Random) -> List[int]:
+                   rng: random.Random,
+                   graph: Optional[PrereqGraph] = None) -> List[int]:
     """
     从 START 行开始构造一条完整拓扑序。
     tau[from_row, to_col], from_row: 0..n (n为START)，to_col: 0..n-1
+    graph: 可选的预编译先修图；给定时用入度计数器增量维护候选集合
     """
+    if graph is not None:
+        return _construct_path_graph(graph, tau, eta, params, rng)
+
     n = len(points)
     start_row = n
     visited: Set[int] = set()
@@ -67,3 +90,200 @@ def construct_path(points: Dict[int, KnowledgePoint],
         current_row = idx[nxt]
 
     return path
+
+
+def _construct_path_graph(graph: PrereqGraph,
+                          tau: np.ndarray,
+                          eta: Dict[int, float],
+                          params: UPKSTParams,
+                          rng: random.Random) -> List[int]:
+    n = graph.n
+    kids = graph.kids
+    succ_of = graph.succ_of
+    indeg = graph.indeg.tolist()
+    frontier = graph.initial_frontier()
+    path: List[int] = []
+    current_row = n
+
+    while len(path) < n:
+        if not frontier:
+            raise ValueError("无可行候选：先修图可能有环，或数据缺失。")
+
+        cand = [kids[v] for v in frontier]
+        weights = [(tau[current_row, v] ** params.alpha) * (eta[kids[v]] ** params.beta) for v in frontier]
+
+        nxt = roulette_choice(cand, weights, rng)
+        v = graph.idx[nxt]
+        path.append(nxt)
+        frontier.remove(v)
+        for u in succ_of[v]:
+            indeg[u] -= 1
+            if indeg[u] == 0:
+                insort(frontier, u)
+        current_row = v
+
+    return path
+
+
+def transition_weights(tau: Union[np.ndarray, SparseTau, LazyTau], eta_vec: np.ndarray,
+                       params: UPKSTParams) -> Union[np.ndarray, SparseTau]:
+    """
+    式(2-6) 的未归一化转移权重：W[from_row, to_col] = τ^alpha · η_to^beta。τ 不变时可被所有蚂蚁共享。
+    τ 为 SparseTau 时返回同结构的 SparseTau（不可达位置权重为 0）；
+    为 LazyTau 时在此读出真实 τ（施加 tau_min 下界）。
+    """
+    if isinstance(tau, LazyTau):
+        w = tau.to_dense()
+        if params.alpha != 1.0:
+            np.power(w, params.alpha, out=w)
+        w *= eta_vec[None, :] ** params.beta
+        return w
+    if isinstance(tau, SparseTau):
+        return tau.with_data((tau.data ** params.alpha) * (eta_vec ** params.beta)[tau.indices], 0.0)
+    return (tau ** params.alpha) * (eta_vec[None, :] ** params.beta)
+
+
+def construct_path_np(graph: PrereqGraph,
+                      weights: Union[np.ndarray, SparseTau],
+                      rng: np.random.Generator) -> List[int]:
+    """
+    numpy 构造引擎：weights 为 transition_weights 的结果。
+    每步把 W 当前行按可行掩码置零后做累积和，按 u·Σw 用 searchsorted 选出下一个点
+    （非候选位置权重为 0，不会被选中）；Σw<=0 时用同一个 u 在候选中均匀抽取。
+    rng：该蚂蚁的随机子流（见 rng.ant_streams），每步调用一次 rng.random()。
+    """
+    if isinstance(weights, SparseTau):
+        return _construct_path_sparse(graph, weights, rng)
+    n = graph.n
+    kids = graph.kids
+    succ_of = graph.succ_of
+    indeg = graph.indeg.tolist()
+    feasible = graph.indeg == 0
+    buf = np.empty(n, dtype=float)
+    path: List[int] = []
+    current_row = n
+
+    while len(path) < n:
+        np.multiply(weights[current_row], feasible, out=buf)
+        buf.cumsum(out=buf)
+        total = buf[-1]
+        # 每步恰好消耗一个均匀数，与 construct_paths_batch 的抽样规则一致
+        u = rng.random()
+        if total > 0:
+            v = int(buf.searchsorted(u * total, side="right"))
+            v = min(v, n - 1)
+        else:
+            cand = np.flatnonzero(feasible)
+            if cand.size == 0:
+                raise ValueError("无可行候选：先修图可能有环，或数据缺失。")
+            v = int(cand[int(u * cand.size)])
+
+        feasible[v] = False
+        path.append(kids[v])
+        for u in succ_of[v]:
+            indeg[u] -= 1
+            if indeg[u] == 0:
+                feasible[u] = True
+        current_row = v
+
+    return path
+
+
+def _construct_path_sparse(graph: PrereqGraph,
+                           weights: SparseTau,
+                           rng: np.random.Generator) -> List[int]:
+    """construct_path_np 的稀疏版本：只在当前行的可达列上做累积和（可行点必在其中），抽样规则相同。"""
+    n = graph.n
+    kids = graph.kids
+    succ_of = graph.succ_of
+    indptr, indices, data = weights.indptr, weights.indices, weights.data
+    indeg = graph.indeg.tolist()
+    feasible = graph.indeg == 0
+    path: List[int] = []
+    current_row = n
+
+    while len(path) < n:
+        lo, hi = indptr[current_row], indptr[current_row + 1]
+        cols = indices[lo:hi]
+        buf = data[lo:hi] * feasible[cols]
+        buf.cumsum(out=buf)
+        total = buf[-1] if len(buf) else 0.0
+        u = rng.random()
+        if total > 0:
+            k = int(buf.searchsorted(u * total, side="right"))
+            v = int(cols[min(k, len(cols) - 1)])
+        else:
+            cand = np.flatnonzero(feasible)
+            if cand.size == 0:
+                raise ValueError("无可行候选：先修图可能有环，或数据缺失。")
+            v = int(cand[int(u * cand.size)])
+
+        feasible[v] = False
+        path.append(kids[v])
+        for u in succ_of[v]:
+            indeg[u] -= 1
+            if indeg[u] == 0:
+                feasible[u] = True
+        current_row = v
+
+    return path
+
+
+def construct_paths_batch(graph: PrereqGraph,
+                          weights: Union[np.ndarray, SparseTau],
+                          n_ants: int,
+                          rng: Optional[np.random.Generator] = None,
+                          uniforms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    批量构造 n_ants 条路径，返回 (n_ants, n) 的列下标矩阵（列 v 对应 graph.kids[v]）。
+    抽样规则与 construct_path_np 相同：每只蚂蚁每步一个均匀数 u，取累积权重首个 > u·Σw 的位置。
+    uniforms: (n_ants, n)，第 a 行为第 a 只蚂蚁各步所用的均匀数（如 rng.draw_uniforms 的结果）；
+              缺省时从 rng 按“每步 n_ants 个”抽取。
+    """
+    n = graph.n
+    if uniforms is None:
+        uniforms = rng.random((n, n_ants)).T
+    elif uniforms.shape != (n_ants, n):
+        raise ValueError(f"uniforms 形状应为 ({n_ants}, {n})，实际为 {uniforms.shape}")
+    ants = np.arange(n_ants)
+    indeg = np.tile(graph.indeg, (n_ants, 1))
+    feasible = indeg == 0
+    current = np.full(n_ants, n, dtype=np.int64)
+    paths = np.empty((n_ants, n), dtype=np.int64)
+
+    for step in range(n):
+        rows = weights.rows_dense(current) if isinstance(weights, SparseTau) else weights[current]
+        cum = np.cumsum(rows * feasible, axis=1)
+        total = cum[:, -1]
+        u = uniforms[:, step]
+
+        # 批量逆 CDF：等价于逐行 searchsorted(u·Σw, side="right")
+        nxt = np.count_nonzero(cum <= (u * total)[:, None], axis=1)
+        np.minimum(nxt, n - 1, out=nxt)
+
+        zero = ~(total > 0)
+        if np.any(zero):
+            cnt = np.count_nonzero(feasible[zero], axis=1)
+            if np.any(cnt == 0):
+                raise ValueError("无可行候选：先修图可能有环，或数据缺失。")
+            kth = (u[zero] * cnt).astype(np.int64)
+            nxt[zero] = np.argmax(np.cumsum(feasible[zero], axis=1) > kth[:, None], axis=1)
+
+        paths[:, step] = nxt
+        feasible[ants, nxt] = False
+
+        # 按 CSR 收集所有蚂蚁所选点的后继，批量扣减入度
+        starts = graph.indptr[nxt]
+        lens = graph.indptr[nxt + 1] - starts
+        m = int(lens.sum())
+        if m:
+            ant_rep = np.repeat(ants, lens)
+            offs = np.arange(m) - np.repeat(np.cumsum(lens) - lens, lens) + np.repeat(starts, lens)
+            succ = graph.succ[offs]
+            np.subtract.at(indeg, (ant_rep, succ), 1)
+            ready = indeg[ant_rep, succ] == 0
+            feasible[ant_rep[ready], succ[ready]] = True
+
+        current = nxt
+
+    return paths
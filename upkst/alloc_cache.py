@@ -0,0 +1,119 @@
+"""
+KKT 时间分配缓存：
+- construct_path 产生的每条路径都是全体知识点的拓扑序，点集相同；
+- allocate_time_kkt、U 与每点贡献 g_i 只依赖点集（与顺序无关），
+  因此同一学生的 n_ants × n_iters 只蚂蚁可以共享一次计算结果；
+- 只有与顺序相关的难度跃迁惩罚需要逐只蚂蚁重新计算。
+
+分配结果以 PointTable 的列（kid 升序）为下标存成数组，不在点集中的列为 0。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import math
+import numpy as np
+
+from .types import KnowledgePoint, StudentState, UPKSTParams
+from .point_table import PointTable
+from .kkt_time import allocate_time_kkt, allocate_time_kkt_batch
+from .objective import utility, contribution, contribution_array
+
+
+@dataclass(frozen=True, eq=False)
+class Allocation:
+    """与路径顺序无关的部分：t、λ*、U 与 g_i（按列）"""
+    t: np.ndarray
+    lam: float
+    U: float
+    g: np.ndarray
+
+    def t_map(self, table: PointTable, path: List[int]) -> Dict[int, float]:
+        idx = table.idx
+        return {i: float(self.t[idx[i]]) for i in path}
+
+
+def compute_allocation(table: PointTable,
+                       cols: np.ndarray,
+                       student: StudentState,
+                       params: UPKSTParams) -> Allocation:
+    """不走缓存，按列集合 cols 计算 t/λ/U/g。"""
+    cols = np.sort(np.asarray(cols, dtype=np.int64))
+    w, m, d = table.w[cols], table.mastery[cols], table.d[cols]
+    t_sub, lam = allocate_time_kkt_batch(w, m, d, float(student.A), params)
+    t_sub = t_sub[0]
+
+    # 式(2-1)(2-16)：g_i = w_i * Δm_i(t_i)
+    g_sub = contribution_array(w, m, d, float(student.A), t_sub, params.k)
+
+    t = np.zeros(table.n)
+    g = np.zeros(table.n)
+    t[cols] = t_sub
+    g[cols] = g_sub
+    return Allocation(t=t, lam=float(lam[0]), U=float(g_sub.sum()), g=g)
+
+
+class AllocationCache:
+    """
+    单个学生的分配缓存，键为 (访问集合, A_s, k, T, t_min, eps)。
+    table 在一次 run_upkst 内不变，因此缓存的生命周期与 run_upkst 相同。
+    check=True 时每次命中都会与基于字典接口的逐点计算比对，不一致则抛 AssertionError。
+    """
+
+    def __init__(self, table: PointTable, student: StudentState, params: UPKSTParams,
+                 check: bool = False):
+        self.table = table
+        self.student = student
+        self.params = params
+        self.check = check
+        self._points: Optional[Dict[int, KnowledgePoint]] = None
+        self._store: Dict[Tuple, Allocation] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, visited: FrozenSet[int]) -> Tuple:
+        p = self.params
+        return (visited, float(self.student.A), p.k, p.T, p.t_min, p.eps)
+
+    def get(self, cols: np.ndarray) -> Allocation:
+        """cols：路径的列下标"""
+        key = self._key(frozenset(cols.tolist()))
+        alloc = self._store.get(key)
+        if alloc is None:
+            self.misses += 1
+            alloc = compute_allocation(self.table, cols, self.student, self.params)
+            self._store[key] = alloc
+        else:
+            self.hits += 1
+        if self.check:
+            if self._points is None:
+                self._points = self.table.to_points()
+            path = [self.table.kids[c] for c in cols.tolist()]
+            _check_allocation(self.table, alloc, *_reference_allocation(self._points, path, self.student, self.params))
+        return alloc
+
+
+def _reference_allocation(points: Dict[int, KnowledgePoint], path: List[int],
+                          student: StudentState, params: UPKSTParams):
+    """逐点的字典接口实现，作为缓存校验的参照"""
+    t_map, lam = allocate_time_kkt(points, path, student, params)
+    U = utility(points, path, t_map, student, params.k)
+    g_map = {i: contribution(points, i, t_map[i], student, params.k) for i in path}
+    return t_map, lam, U, g_map
+
+
+def _check_allocation(table: PointTable, cached: Allocation, t_map: Dict[int, float], lam: float, U: float,
+                      g_map: Dict[int, float], tol: float = 1e-8) -> None:
+    def close(a: float, b: float) -> bool:
+        return math.isclose(a, b, rel_tol=tol, abs_tol=tol)
+
+    idx = table.idx
+    for i, t in t_map.items():
+        c = idx[i]
+        if not close(cached.t[c], t):
+            raise AssertionError(f"分配缓存校验失败：t[{i}] 缓存={cached.t[c]} 实算={t}")
+        if not close(cached.g[c], g_map[i]):
+            raise AssertionError(f"分配缓存校验失败：g[{i}] 缓存={cached.g[c]} 实算={g_map[i]}")
+    if not close(cached.U, U):
+        raise AssertionError(f"分配缓存校验失败：U 缓存={cached.U} 实算={U}")
+    if not close(cached.lam, lam):
+        raise AssertionError(f"分配缓存校验失败：λ 缓存={cached.lam} 实算={lam}")
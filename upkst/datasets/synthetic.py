@@ -0,0 +1,153 @@
+"""
+合成数据（压测用）：
+- make_layered_dag：分层随机先修 DAG，层数（深度）与入度（fan-in）可控，w/d 分布可调；
+- make_raw_long：N 个学生 × E 次考试 × 知识点的 raw_long 考试表，带缺考、考试不覆盖全部知识点、
+  单项缺失等缺失模式，列与 load_long_table 的输出一致；
+- make_raw_long_rows：按目标行数（而不是学生数）生成 raw_long，供基准使用。
+
+全部由 seed 决定；make_raw_long 按 (学生, 考试, 知识点) 网格整体向量化生成，
+数百万行只需数秒。
+"""
+from __future__ import annotations
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..types import KnowledgePoint
+
+
+def make_layered_dag(n: int,
+                     n_layers: Optional[int] = None,
+                     max_fan_in: int = 2,
+                     max_skip: int = 3,
+                     w_median: float = 6.0,
+                     w_sigma: float = 0.6,
+                     d_range: Tuple[float, float] = (2.0, 4.5),
+                     d_depth_corr: float = 0.5,
+                     d_step: float = 0.5,
+                     base_unit: float = 6.0,
+                     mastery: float = 0.5,
+                     seed: int = 0) -> Dict[int, KnowledgePoint]:
+    """
+    n:            知识点数，kid 为 1..n，按层编号（先修的 kid 总小于后继）
+    n_layers:     层数，即最长先修链的长度；缺省为 round(sqrt(n))
+    max_fan_in:   每个非首层点的先修个数在 1..max_fan_in 间均匀抽取，其中至少一个来自上一层
+    max_skip:     其余先修可来自前 max_skip 层
+    w_median / w_sigma: w ~ 对数正态（中位数, σ）
+    d_range / d_depth_corr / d_step: d 在 d_range 内，与所在层深度的相关程度为 d_depth_corr ∈ [0,1]，
+                  并按 d_step 取整（星级；0 表示不取整）
+    base_unit / mastery: 同 make_points_from_table：t_base = base_unit * d，初始掌握度
+    """
+    if n <= 0:
+        raise ValueError(f"n 必须为正数，实际为 {n}")
+    n_layers = max(1, min(n, n_layers if n_layers else int(round(np.sqrt(n)))))
+    if max_fan_in < 1 or max_skip < 1:
+        raise ValueError("max_fan_in 与 max_skip 至少为 1")
+    rng = np.random.default_rng(seed)
+
+    # 每层至少一个点，其余随机分到各层
+    sizes = np.ones(n_layers, dtype=np.int64) + np.bincount(rng.integers(0, n_layers, n - n_layers),
+                                                           minlength=n_layers)
+    layer = np.repeat(np.arange(n_layers), sizes)
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+
+    w = rng.lognormal(np.log(w_median), w_sigma, n)
+    depth = layer / max(1, n_layers - 1)
+    lo, hi = d_range
+    d = lo + (hi - lo) * (d_depth_corr * depth + (1.0 - d_depth_corr) * rng.random(n))
+    if d_step > 0:
+        d = np.clip(np.round(d / d_step) * d_step, lo, hi)
+
+    points: Dict[int, KnowledgePoint] = {}
+    for i in range(n):
+        li = int(layer[i])
+        pre: Sequence[int] = ()
+        if li > 0:
+            k = int(rng.integers(1, max_fan_in + 1))
+            first = int(rng.integers(starts[li - 1], starts[li]))
+            pool = np.arange(starts[max(0, li - max_skip)], starts[li])
+            pool = pool[pool != first]
+            extra = rng.choice(pool, size=min(k - 1, len(pool)), replace=False)
+            pre = sorted({first, *extra.tolist()})
+        kid = i + 1
+        points[kid] = KnowledgePoint(kid=kid, name=f"KP{kid:05d}", w=float(w[i]), d=float(d[i]),
+                                     t_base=base_unit * float(d[i]), mastery=float(mastery),
+                                     prereqs=tuple(j + 1 for j in pre))
+    return points
+
+
+def make_raw_long(n_students: int,
+                  n_exams: int = 20,
+                  kp_names: Optional[Sequence[str]] = None,
+                  kp_difficulty: Optional[Sequence[float]] = None,
+                  coverage: float = 1.0,
+                  absent_rate: float = 0.0,
+                  missing_rate: float = 0.0,
+                  start_date: str = "2023-09-01",
+                  freq: str = "14D",
+                  seed: int = 0) -> pd.DataFrame:
+    """
+    合成 raw_long：列 student_id, exam_id, exam_date, exam_weight, kp_name, score_rate
+    （student_id / exam_id / kp_name 为 category）。
+
+    kp_names:      知识点名，缺省为 TABLE3_3 的 17 个
+    kp_difficulty: 与 kp_names 对齐的难度（越难得分率越低），缺省全为 3
+    coverage:      每次考试覆盖的知识点比例（每次至少覆盖 1 个）
+    absent_rate:   学生整场缺考的概率
+    missing_rate:  单个 (学生, 考试, 知识点) 记录缺失的概率
+    得分率 = clip(0.55 + 0.15·能力 + 0.05·进步·考试序号 - 0.08·(难度-3) + 噪声, 0, 1)；每第 4 次考试权重 1.5。
+    """
+    if kp_names is None:
+        from .paper_table3_3 import TABLE3_3
+        kp_names = [row[0] for row in TABLE3_3]
+    kp_names = list(kp_names)
+    n_kp = len(kp_names)
+    diff = np.full(n_kp, 3.0) if kp_difficulty is None else np.asarray(kp_difficulty, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    per_student = n_exams * n_kp
+    s_code = np.repeat(np.arange(n_students), per_student)
+    e_code = np.tile(np.repeat(np.arange(n_exams), n_kp), n_students)
+    k_code = np.tile(np.arange(n_kp), n_students * n_exams)
+
+    ability = rng.normal(0.0, 1.0, n_students)
+    growth = rng.normal(0.0, 0.1, n_students)
+    rate = 0.55 + 0.15 * ability[s_code] + 0.05 * growth[s_code] * e_code - 0.08 * (diff[k_code] - 3.0) \
+        + rng.normal(0.0, 0.12, len(s_code))
+    np.clip(rate, 0.0, 1.0, out=rate)
+
+    keep = None
+    if coverage < 1.0:
+        covered = rng.random((n_exams, n_kp)) < coverage
+        covered[np.arange(n_exams), rng.integers(0, n_kp, n_exams)] = True
+        keep = covered[e_code, k_code]
+    if absent_rate > 0:
+        present = ~(rng.random((n_students, n_exams)) < absent_rate)
+        keep = present[s_code, e_code] if keep is None else keep & present[s_code, e_code]
+    if missing_rate > 0:
+        m = rng.random(len(s_code)) >= missing_rate
+        keep = m if keep is None else keep & m
+    if keep is not None:
+        s_code, e_code, k_code, rate = s_code[keep], e_code[keep], k_code[keep], rate[keep]
+
+    dates = pd.date_range(start_date, periods=n_exams, freq=freq)
+    return pd.DataFrame({
+        "student_id": pd.Categorical.from_codes(s_code, [f"S{i:07d}" for i in range(n_students)]),
+        "exam_id": pd.Categorical.from_codes(e_code, [f"E{i:03d}" for i in range(n_exams)]),
+        "exam_date": dates[e_code],
+        "exam_weight": np.where(e_code % 4 == 3, 1.5, 1.0),
+        "kp_name": pd.Categorical.from_codes(k_code, kp_names),
+        "score_rate": rate,
+    })
+
+
+def make_raw_long_rows(n_rows: int, n_exams: int = 20, seed: int = 0, **kwargs) -> pd.DataFrame:
+    """约 n_rows 行的 raw_long：学生数 = n_rows // (n_exams × 知识点数)（至少 1），其余参数同 make_raw_long。"""
+    if kwargs.get("kp_names") is not None:
+        n_kp = len(kwargs["kp_names"])
+    else:
+        from .paper_table3_3 import TABLE3_3
+        n_kp = len(TABLE3_3)
+    n_students = max(1, n_rows // (n_exams * n_kp))
+    return make_raw_long(n_students, n_exams=n_exams, seed=seed, **kwargs)
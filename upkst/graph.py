@@ -0,0 +1,62 @@
+"""
+先修图预编译（CSR）：
+- 节点编号 0..n-1 与 tau 的列一致（按 kid 升序）；
+- succ[indptr[v]:indptr[v+1]] 为 v 的后继（以 v 为先修的知识点）；
+- indeg[v] 为 v 的先修个数；不在点集中的先修永远无法满足，同样计入 indeg。
+
+蚂蚁构造路径时只需维护剩余入度与可行前沿，每选一个点的更新代价为 O(出度)，
+不必像 feasible_candidates 那样每步重扫全部点与先修。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+import numpy as np
+
+from .types import KnowledgePoint
+
+
+@dataclass(frozen=True, eq=False)
+class PrereqGraph:
+    kids: Tuple[int, ...]
+    idx: Dict[int, int]
+    indptr: np.ndarray
+    succ: np.ndarray
+    indeg: np.ndarray
+    # 与 CSR 等价的元组形式，供纯 Python 构造循环使用（避免逐元素访问 ndarray）
+    succ_of: Tuple[Tuple[int, ...], ...]
+
+    @property
+    def n(self) -> int:
+        return len(self.kids)
+
+    def initial_frontier(self) -> List[int]:
+        """入度为 0 的节点（升序）"""
+        return [int(v) for v in np.flatnonzero(self.indeg == 0)]
+
+
+def compile_prereqs(points: Dict[int, KnowledgePoint]) -> PrereqGraph:
+    kids = tuple(sorted(points.keys()))
+    idx = {kid: i for i, kid in enumerate(kids)}
+    n = len(kids)
+
+    succ_lists: List[List[int]] = [[] for _ in range(n)]
+    indeg = np.zeros(n, dtype=np.int64)
+    for kid in kids:
+        v = idx[kid]
+        for pre in points[kid].prereqs:
+            indeg[v] += 1
+            if pre in idx:
+                succ_lists[idx[pre]].append(v)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(s) for s in succ_lists])
+    succ = np.fromiter((u for s in succ_lists for u in s), dtype=np.int64, count=int(indptr[-1]))
+
+    return PrereqGraph(
+        kids=kids,
+        idx=idx,
+        indptr=indptr,
+        succ=succ,
+        indeg=indeg,
+        succ_of=tuple(tuple(s) for s in succ_lists),
+    )
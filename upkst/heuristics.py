@@ -4,7 +4,10 @@
 """
 from __future__ import annotations
 from typing import Dict
+import numpy as np
+
 from .types import KnowledgePoint
+from .point_table import PointTable
 
 
 def build_eta(points: Dict[int, KnowledgePoint], eps: float) -> Dict[int, float]:
@@ -14,3 +17,10 @@ def build_eta(points: Dict[int, KnowledgePoint], eps: float) -> Dict[int, float]
         denom = denom if denom > eps else eps
         eta[kid] = (p.w * (1.0 - p.mastery)) / denom
     return eta
+
+
+def build_eta_vector(table: PointTable, eps: float) -> np.ndarray:
+    """数组版 build_eta：按列（kid 升序）返回 η"""
+    denom = table.t_base * table.d
+    denom = np.where(denom > eps, denom, eps)
+    return table.w * (1.0 - table.mastery) / denom
@@ -12,22 +12,114 @@ kkt_time.py
 KKT 得到闭式：
   t_i*(λ) = max{ t_min, (1/a_i) ln( w_i(1-m_i)a_i / λ ) }
 
-λ 通过总时长等式 Σ t_i*(λ) = T 用二分法求解。
+λ 的精确求解（注水法，无二分容差）：
+- 记 c_i = w_i(1-m_i)a_i，点 i 恰好压到 t_min 的临界值 λ_i = c_i exp(-a_i t_min)；
+- λ 越小，未锁死的点越多：按 λ_i 从大到小排序，第 k 个点未锁死 ⇔ Σt(λ_k) < T；
+- 设未锁死集合为 F，T' = T - (n-|F|) t_min，则
+    ln λ* = (Σ_{i∈F} ln(c_i)/a_i - T') / Σ_{i∈F} 1/a_i
+  代回闭式即可得到严格满足 Σt = T 的分配。复杂度 O(n log n)。
 
 注意：
 - 本实现假设 P 包含所有知识点，因此可行性必须满足：T ≥ |P| * t_min
 - 若出现“所有点都被锁死在 t_min 但 T 更大”的退化情况（例如所有 c_i≈0），
-  则目标对额外时间近似不敏感，本实现会把剩余时间均分出去以满足等式约束。
+  则目标对额外时间不敏感，本实现会把剩余时间均分出去以满足等式约束（此时 λ*=0）。
+- allocate_time_kkt_batch 接受 (S, n) 数组，一次为整个学生群体分配时间。
 """
 
 from __future__ import annotations
 
 from typing import Dict, List, Tuple
-import math
+
+import numpy as np
 
 from .types import KnowledgePoint, StudentState, UPKSTParams
 
 
+def allocate_time_kkt_batch(
+    w: np.ndarray,
+    m: np.ndarray,
+    d: np.ndarray,
+    A,
+    params: UPKSTParams,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    批量精确 KKT 分配。
+    w, m, d: 形状 (n,) 或 (S, n)，可相互广播；A: 标量或 (S,)
+    返回：
+      t:   (S, n) 时间分配（输入全为一维时 S=1）
+      lam: (S,)   λ*
+    """
+    w = np.asarray(w, dtype=float)
+    m = np.asarray(m, dtype=float)
+    d = np.asarray(d, dtype=float)
+    A = np.asarray(A, dtype=float).reshape(-1, 1)
+    w, m, d = np.broadcast_arrays(np.atleast_2d(w), np.atleast_2d(m), np.atleast_2d(d))
+    S = max(w.shape[0], A.shape[0])
+    n = w.shape[1]
+    if n == 0:
+        return np.zeros((S, 0)), np.zeros(S)
+
+    T = float(params.T)
+    t_min = float(params.t_min)
+
+    # 1) 可行性检查（P包含所有知识点时尤为关键）
+    if T < n * t_min - 1e-12:
+        raise ValueError(f"Infeasible time budget: T={T} < |P|*t_min={n * t_min}")
+
+    # 2) a_i 与 c_i（导数系数）：f'_i(t) = c_i * exp(-a_i t)
+    a = params.k * A / np.maximum(d, params.eps)
+    a = np.maximum(np.broadcast_to(a, (S, n)), params.eps)
+    c = np.maximum(w * (1.0 - m) * a, 0.0)
+    c = np.broadcast_to(c, (S, n))
+
+    # 3) 临界 ln λ_i = ln c_i - a_i t_min；c_i=0 的点永远锁死（-inf）
+    alive = c > 0.0
+    lnc = np.where(alive, np.log(np.where(alive, c, 1.0)), 0.0)
+    lnb = np.where(alive, lnc - a * t_min, -np.inf)
+
+    order = np.argsort(-lnb, axis=1, kind="stable")
+    lnb_s = np.take_along_axis(lnb, order, axis=1)
+    inv_s = np.take_along_axis(1.0 / a, order, axis=1)
+    lnc_s = np.take_along_axis(lnc, order, axis=1)
+    alive_s = np.take_along_axis(alive, order, axis=1)
+
+    # 前缀和：cum_*[:, j] 为排序后前 j 个点之和（j=0..n）
+    zeros = np.zeros((S, 1))
+    cum_inv = np.concatenate([zeros, np.cumsum(np.where(alive_s, inv_s, 0.0), axis=1)], axis=1)
+    cum_lnc = np.concatenate([zeros, np.cumsum(np.where(alive_s, lnc_s * inv_s, 0.0), axis=1)], axis=1)
+
+    # 4) Σt 在第 j 个临界点处的取值：前 j 个点未锁死，其余为 t_min
+    j = np.arange(n)
+    lnb_fin = np.where(alive_s, lnb_s, 0.0)
+    s_at = cum_lnc[:, :n] - lnb_fin * cum_inv[:, :n] + (n - j) * t_min
+    s_at = np.where(alive_s, s_at, np.inf)
+    k = np.sum(s_at < T, axis=1)  # 未锁死的点数 |F|
+
+    t = np.full((S, n), t_min)
+    lam = np.zeros(S)
+
+    free_rows = k > 0
+    if np.any(free_rows):
+        kf = k[free_rows]
+        T_free = T - (n - kf) * t_min
+        ln_lam = (cum_lnc[free_rows, kf] - T_free) / cum_inv[free_rows, kf]
+        lam[free_rows] = np.exp(ln_lam)
+
+        t_s = np.where(j[None, :] < kf[:, None], (lnc_s[free_rows] - ln_lam[:, None]) * inv_s[free_rows], t_min)
+        t_sub = np.empty_like(t_s)
+        np.put_along_axis(t_sub, order[free_rows], t_s, axis=1)
+        t[free_rows] = t_sub
+
+    # 5) 退化情况：全部锁死（c_i 全≈0 或 T = n*t_min）
+    locked = ~free_rows
+    if np.any(locked):
+        t[locked] = t_min + (T - n * t_min) / n
+        top = lnb_s[locked, 0]
+        lam[locked] = np.where(np.isfinite(top), np.exp(np.where(np.isfinite(top), top, 0.0)), 0.0)
+
+    return t, lam
+
+
 def allocate_time_kkt(
     points: Dict[int, KnowledgePoint],
     path: List[int],
@@ -43,98 +135,10 @@ def allocate_time_kkt(
     if n == 0:
         return {}, 0.0
 
-    # 1) 可行性检查（P包含所有知识点时尤为关键）
-    if params.T < n * params.t_min - 1e-12:
-        raise ValueError(f"Infeasible time budget: T={params.T} < |P|*t_min={n*params.t_min}")
-
-    # 2) 预计算 a_i 与 c_i（导数系数）
-    #    f'_i(t) = c_i * exp(-a_i t),  其中 c_i = w_i(1-m_i)a_i
-    a: Dict[int, float] = {}
-    c: Dict[int, float] = {}
-    for i in path:
-        p = points[i]
-        ai = params.k * float(student.A) / max(float(p.d), params.eps)
-        ai = max(ai, params.eps)
-        ci = float(p.w) * (1.0 - float(p.mastery)) * ai
-        a[i] = ai
-        c[i] = max(ci, 0.0)
-
-    def t_of_lambda(lam: float) -> Dict[int, float]:
-        """按闭式计算 t_i(λ)，并做下界截断：t_i>=t_min"""
-        lam = max(lam, params.eps)
-        out: Dict[int, float] = {}
-        for i in path:
-            ai = a[i]
-            ci = c[i]
-
-            # 无约束解： (1/ai) ln(ci/lam)
-            # 若 ci=0，则 ln(0) -> -inf，最后会被 max 截断到 t_min
-            ratio = ci / lam
-            ratio = max(ratio, params.eps)  # 防止 log(0)
-            t_un = (1.0 / ai) * math.log(ratio)
-
-            # 下界：t_i >= t_min  →  max
-            out[i] = max(params.t_min, t_un)
-        return out
-
-    def sum_t(lam: float) -> float:
-        tm = t_of_lambda(lam)
-        return sum(tm[i] for i in path)
-
-    # 3) 构造二分区间
-    # λ 越大 -> t 越小 -> Σt 越小（单调）
-    lam_lo = 1e-12
-
-    # 选一个足够大的 lam_hi，使所有点都压到 t_min：
-    # 当 lam >= c_i * exp(-a_i*t_min) 时，无约束解 <= t_min
-    lam_hi = max(c[i] * math.exp(-a[i] * params.t_min) for i in path) + 1e-12
-    lam_hi = max(lam_hi, 1e-12)
-
-    # 理论上：sum(lam_lo) >= T >= sum(lam_hi)=n*t_min
-    # 这里做个稳健兜底（极端数值下可能需要扩大 lam_hi）
-    if sum_t(lam_hi) > params.T + 1e-9:
-        # 扩大到足够大，直到 Σt <= T
-        for _ in range(50):
-            lam_hi *= 10.0
-            if sum_t(lam_hi) <= params.T + 1e-9:
-                break
-
-    # 4) 二分求 λ*
-    for _ in range(80):
-        lam_mid = 0.5 * (lam_lo + lam_hi)
-        s_mid = sum_t(lam_mid)
-
-        if abs(s_mid - params.T) <= 1e-9:
-            lam_lo = lam_hi = lam_mid
-            break
-
-        if s_mid > params.T:
-            # 时间太多：增大 λ 把时间压下来
-            lam_lo = lam_mid
-        else:
-            # 时间太少：减小 λ 把时间放大
-            lam_hi = lam_mid
-
-    lam_star = 0.5 * (lam_lo + lam_hi)
-    t_map = t_of_lambda(lam_star)
-
-    # 5) 数值误差修正：把 gap 分配出去，确保严格 Σt=T
-    s = sum(t_map[i] for i in path)
-    gap = params.T - s
-
-    if abs(gap) > 1e-8:
-        # 优先分给未锁死点（t > t_min）
-        free = [i for i in path if t_map[i] > params.t_min + 1e-12]
-
-        if free:
-            add = gap / len(free)
-            for i in free:
-                t_map[i] = max(params.t_min, t_map[i] + add)
-        else:
-            # 退化情况：全部锁死但仍有 gap（例如 c_i 全≈0）
-            # 目标对额外时间不敏感，均分以满足等式约束
-            add = gap / n
-            for i in path:
-                t_map[i] = max(params.t_min, t_map[i] + add)
-
-    return t_map, lam_star
+    w = np.fromiter((points[i].w for i in path), dtype=float, count=n)
+    m = np.fromiter((points[i].mastery for i in path), dtype=float, count=n)
+    d = np.fromiter((points[i].d for i in path), dtype=float, count=n)
+
+    t, lam = allocate_time_kkt_batch(w, m, d, float(student.A), params)
+    t_map = {i: float(ti) for i, ti in zip(path, t[0])}
+    return t_map, float(lam[0])
@@ -0,0 +1,59 @@
+"""
+惰性挥发：τ 以“缩放形式”保存，真实值 τ = max(scale · scaled, tau_min)。
+
+稠密模式每轮 τ ← clip((1-ρ) τ + Δτ)，要对整个 (n+1)×n 矩阵做一次乘法和一次裁剪。
+这里挥发只是 scale ← (1-ρ) scale；只有本轮被沉积的位置才读出、更新、写回：
+    scaled ← clip(max(scaled, (1-ρ)·tau_min / scale') + Δτ / scale', tau_min / scale', tau_max / scale')
+未被沉积的位置只会衰减，上界自然满足；下界在读取时（transition_weights / to_dense）用 max(·, tau_min) 精确施加。
+当 scale 接近下溢时把它并回矩阵（并回时取 max(·, tau_min) 不改变今后的任何读数）。
+
+与稠密模式相比，每轮更新的代价与沉积数成正比；数值上只差浮点舍入（连乘 vs 缩放）。
+"""
+from __future__ import annotations
+from typing import Tuple
+import numpy as np
+
+
+# scale 低于该值时并回矩阵（远高于 float64 的下溢阈值）
+RENORM_BELOW = 1e-150
+
+
+class LazyTau:
+    def __init__(self, tau: np.ndarray, tau_min: float, tau_max: float):
+        self.scaled = np.array(tau, dtype=float)
+        self.scale = 1.0
+        self.tau_min = float(tau_min)
+        self.tau_max = float(tau_max)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.scaled.shape
+
+    def to_dense(self) -> np.ndarray:
+        """真实的 τ（读取时施加下界）"""
+        tau = self.scaled * self.scale
+        return np.maximum(tau, self.tau_min, out=tau)
+
+    def renormalize(self) -> None:
+        self.scaled = self.to_dense()
+        self.scale = 1.0
+
+    def evaporate(self, factor: float) -> None:
+        """式(2-15)：τ ← factor · τ（factor = 1-ρ）"""
+        if self.scale < RENORM_BELOW:
+            self.renormalize()
+        self.scale *= factor
+
+    def deposit(self, rows: np.ndarray, cols: np.ndarray, amounts: np.ndarray, factor: float) -> None:
+        """
+        式(2-18)：在 evaporate(factor) 之后调用，只读写被沉积的位置；增量预先除以 scale。
+        同一位置的多次沉积先累加再裁剪，与稠密模式的 np.add.at + clip 一致（重复下标写入的是同一个值）。
+        """
+        if len(rows) == 0:
+            return
+        inv = 1.0 / self.scale
+        flat = self.scaled.reshape(-1)
+        at = np.asarray(rows, dtype=np.int64) * self.scaled.shape[1] + cols
+        flat[at] = np.maximum(flat[at], factor * self.tau_min * inv)
+        np.add.at(flat, at, np.asarray(amounts, dtype=float) * inv)
+        flat[at] = np.clip(flat[at], self.tau_min * inv, self.tau_max * inv)
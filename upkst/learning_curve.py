@@ -1,16 +1,25 @@
 """
 学习曲线与掌握提升：式(2-1)(2-2)
+
+delta_mastery_array 为数组版本（参数可相互广播，如 (ants × n) 的时间矩阵），
+delta_mastery 为单点的纯 Python 版本（不经过 numpy 标量）。
 """
 from __future__ import annotations
 import math
 import numpy as np
 
 
+def delta_mastery_array(mastery, A, d, t, k: float) -> np.ndarray:
+    """式(2-1) 的数组版本：各参数按 numpy 规则广播"""
+    a = k * np.asarray(A, dtype=float) / np.maximum(d, 1e-12)
+    return (1.0 - np.clip(mastery, 0.0, 1.0)) * (1.0 - np.exp(-a * t))
+
+
 def delta_mastery(mastery: float, A: float, d: float, t: float, k: float) -> float:
     """
     式(2-1): Δm_{s,i}(t_i) = (1 - m_{s,i}) (1 - exp(-k * A_s / d_i * t_i))
     """
-    mastery = float(np.clip(mastery, 0.0, 1.0))
+    mastery = min(max(float(mastery), 0.0), 1.0)
     a = k * A / max(d, 1e-12)
     return (1.0 - mastery) * (1.0 - math.exp(-a * t))
 
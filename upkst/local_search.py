@@ -0,0 +1,87 @@
+"""
+局部搜索：在不破坏先修关系的前提下调整路径顺序，降低难度跃迁惩罚。
+
+点集不变，t/λ/U 不变（见 alloc_cache.py），因此只需比较惩罚 Σ max(0, d_next - d_curr)。
+移动：把长度 1..max_block 的连续块整体挪到别处（长度 1、挪动一位即相邻交换）。
+一次移动只改变三条边，惩罚增量 O(1)：
+    删除块：  J(a,b1) + J(bk,c)  →  J(a,c)
+    插入 x,y 之间：J(x,y)  →  J(x,b1) + J(bk,y)
+块每越过一个点只需检查该点与块内（≤ max_block 个）点的直接先修关系，一旦冲突即停止该方向的扫描。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import FrozenSet, List, Tuple
+import numpy as np
+
+from .graph import PrereqGraph
+
+
+@dataclass(frozen=True, eq=False)
+class MoveTables:
+    """jump[u][v] = max(0, d_v - d_u)，下标 n 为路径两端的哨兵（与任何点之间惩罚为 0）；pre[v] 为 v 的直接先修列"""
+    jump: Tuple[Tuple[float, ...], ...]
+    pre: Tuple[FrozenSet[int], ...]
+
+
+def build_move_tables(graph: PrereqGraph, d: np.ndarray) -> MoveTables:
+    n = graph.n
+    d = np.asarray(d, dtype=float)
+    J = np.zeros((n + 1, n + 1))
+    J[:n, :n] = np.maximum(d[None, :] - d[:, None], 0.0)
+    pre: List[set] = [set() for _ in range(n)]
+    for u, succ in enumerate(graph.succ_of):
+        for v in succ:
+            pre[v].add(u)
+    return MoveTables(jump=tuple(map(tuple, J.tolist())), pre=tuple(frozenset(s) for s in pre))
+
+
+def improve_path(cols, tables: MoveTables, max_block: int = 3,
+                 tol: float = 1e-12) -> Tuple[np.ndarray, float]:
+    """
+    最速下降：每轮取惩罚下降最多的块移动，直到没有可改进的移动。
+    cols: 路径的列下标；返回 (新路径列下标, 惩罚变化量 ≤ 0)
+    """
+    p = [int(c) for c in cols]
+    n = len(p)
+    J, pre = tables.jump, tables.pre
+    S = len(J) - 1  # 哨兵
+    total = 0.0
+
+    while True:
+        best_delta, best_move = -tol, None
+        for L in range(1, min(max_block, n - 1) + 1):
+            for i in range(0, n - L + 1):
+                block = p[i:i + L]
+                b1, bk = block[0], block[-1]
+                a = p[i - 1] if i > 0 else S
+                c = p[i + L] if i + L < n else S
+                base = J[a][b1] + J[bk][c] - J[a][c]
+
+                # 向前挪：依次越过 p[k]（k = i-1, i-2, ...），插到 p[k-1] 与 p[k] 之间
+                for k in range(i - 1, -1, -1):
+                    y = p[k]
+                    if any(y in pre[b] for b in block):
+                        break
+                    x = p[k - 1] if k > 0 else S
+                    delta = J[x][b1] + J[bk][y] - J[x][y] - base
+                    if delta < best_delta:
+                        best_delta, best_move = delta, (i, L, k)
+
+                # 向后挪：依次越过 p[k]（k = i+L, ...），插到 p[k] 与 p[k+1] 之间
+                for k in range(i + L, n):
+                    x = p[k]
+                    if pre[x].intersection(block):
+                        break
+                    z = p[k + 1] if k + 1 < n else S
+                    delta = J[x][b1] + J[bk][z] - J[x][z] - base
+                    if delta < best_delta:
+                        best_delta, best_move = delta, (i, L, k + 1)
+
+        if best_move is None:
+            return np.asarray(p, dtype=np.int64), total
+        i, L, k = best_move
+        block = p[i:i + L]
+        rest = p[:i] + p[i + L:]
+        pos = k if k < i else k - L   # 在 rest 中的插入位置
+        p = rest[:pos] + block + rest[pos:]
+        total += best_delta
@@ -12,14 +12,48 @@ objective.py
 若使用 Q = 1/(max(L,0)+eps) 会在 L<0 时导致 Q≈1/eps 恒大（如 1e9），信息素更新失真。
 因此采用稳定单调映射：
     Q = max(0, -L) + eps
+
+*_array 为数组内核：按列（kid 升序）的 w/m/d 向量配合 (ants × n) 的路径/时间矩阵，
+一次算出整轮蚂蚁的 g、U 与惩罚；字典接口的函数是它们的薄包装。
 """
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
 
 from .types import KnowledgePoint, StudentState
-from .learning_curve import delta_mastery
+from .learning_curve import delta_mastery_array
+
+
+def contribution_array(w, mastery, d, A, t, k: float) -> np.ndarray:
+    """式(2-16) 数组版：g = w * Δm(t)，参数可广播（如 t 为 (ants × n)）"""
+    return np.asarray(w, dtype=float) * delta_mastery_array(mastery, A, d, t, k)
+
+
+def utility_array(w, mastery, d, A, t, k: float) -> np.ndarray:
+    """式(2-3) 数组版：沿最后一维求和，t 为 (ants × n) 时返回 (ants,)"""
+    return np.sum(contribution_array(w, mastery, d, A, t, k), axis=-1)
+
+
+def difficulty_jump_penalty_array(d: np.ndarray, paths: np.ndarray) -> np.ndarray:
+    """式(2-4) 数组版：paths 为 (ants × n) 的列下标，返回每条路径的 Σ max(0, d_next - d_curr)"""
+    dp = np.asarray(d, dtype=float)[paths]
+    return np.sum(np.maximum(np.diff(dp, axis=-1), 0.0), axis=-1)
+
+
+def quality_from_loss_array(L: np.ndarray, eps: float) -> np.ndarray:
+    """quality_from_loss 的数组版"""
+    return np.maximum(0.0, -np.asarray(L, dtype=float)) + float(eps)
+
+
+def _path_arrays(points: Dict[int, KnowledgePoint], path: List[int]):
+    kps = [points[i] for i in path]
+    w = np.array([p.w for p in kps], dtype=float)
+    m = np.array([p.mastery for p in kps], dtype=float)
+    d = np.array([p.d for p in kps], dtype=float)
+    return w, m, d
 
 
 def utility(
@@ -30,19 +64,15 @@ def utility(
     k: float,
 ) -> float:
     """式(2-3): U(P,t;s) = Σ w_i * Δm_i(t_i)"""
-    s = 0.0
-    for i in path:
-        p = points[i]
-        s += float(p.w) * delta_mastery(float(p.mastery), float(student.A), float(p.d), float(t_map[i]), k)
-    return s
+    w, m, d = _path_arrays(points, path)
+    t = np.array([t_map[i] for i in path], dtype=float)
+    return float(utility_array(w, m, d, float(student.A), t, k))
 
 
 def difficulty_jump_penalty(points: Dict[int, KnowledgePoint], path: List[int]) -> float:
     """式(2-4): Σ max(0, d_{p_{j+1}} - d_{p_j})"""
-    jump = 0.0
-    for a, b in zip(path[:-1], path[1:]):
-        jump += max(0.0, float(points[b].d) - float(points[a].d))
-    return jump
+    d = np.array([points[i].d for i in path], dtype=float)
+    return float(difficulty_jump_penalty_array(d, np.arange(len(path))))
 
 
 def loss(
@@ -52,11 +82,14 @@ def loss(
     student: StudentState,
     k: float,
     beta_jump: float,
+    U: Optional[float] = None,
 ) -> float:
     """
     式(2-4): L(P,t;s) = -U(P,t;s) + beta_jump * Σ max(0, d_next - d_curr)
+    U: 已算好的效用；给定时不再重算
     """
-    U = utility(points, path, t_map, student, k)
+    if U is None:
+        U = utility(points, path, t_map, student, k)
     return -U + float(beta_jump) * difficulty_jump_penalty(points, path)
 
 
@@ -78,4 +111,4 @@ def contribution(
 ) -> float:
     """式(2-16): g_i = w_i * Δm_i(t_i)"""
     p = points[i]
-    return float(p.w) * delta_mastery(float(p.mastery), float(student.A), float(p.d), float(t_i), k)
+    return float(contribution_array(p.w, p.mastery, p.d, float(student.A), float(t_i), k))
@@ -3,12 +3,146 @@
 - 挥发：τ ← (1-ρ) τ
 - 增量：Δτ_ij = Q * g_i / (Σ g + eps)  (i,j)∈P
 - 更新：τ ← τ + Δτ
+
+deposit_pheromone 接受数组形式的解（paths/g/Q），用 np.add.at 直接散射到 τ，
+不再分配临时的 Δτ 矩阵。沉积策略（UPKSTParams.deposit）：
+- "all"：    全部蚂蚁按上式沉积（原始做法）
+- "elitist"："all" 之外，历史最优解额外以 elite_weight 倍沉积
+- "rank"：   按 Q 排序，前 rank_w-1 只蚂蚁以 (rank_w - r) 倍沉积，历史最优以 rank_w 倍沉积
+- "mmas"：   只有本轮最优（mmas_global_best=True 时为历史最优）沉积，配合 tau_min/tau_max 裁剪
+
+START→首个点的边默认不强化（与原实现一致）；deposit_start=True 时以 Q * g_{p_1} / (Σ g + eps) 沉积。
+
+τ 也可以是 sparse_tau.SparseTau（UPKSTParams.sparse_tau=True）：挥发/沉积/裁剪逐元素与稠密模式相同；
+或 lazy_tau.LazyTau（UPKSTParams.lazy_evaporation=True）：挥发只改缩放因子，只读写被沉积的位置。
 """
 from __future__ import annotations
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
 
 from .types import KnowledgePoint, UPKSTParams
+from .sparse_tau import SparseTau
+from .lazy_tau import LazyTau
+
+
+DEPOSIT_STRATEGIES = ("all", "elitist", "rank", "mmas")
+
+
+def deposit_pheromone(tau: Union[np.ndarray, SparseTau, LazyTau],
+                      paths: np.ndarray,
+                      g: np.ndarray,
+                      Q: np.ndarray,
+                      params: UPKSTParams,
+                      best: Optional[Tuple[np.ndarray, np.ndarray, float]] = None) -> None:
+    """
+    paths: (n_ants, n) 路径的列下标矩阵
+    g:     (n_ants, n) 与 paths 同位置对齐的贡献 g_{p_k}
+    Q:     (n_ants,)   各解的质量
+    best:  历史最优解 (path_cols, g_row, Q)，elitist/rank/mmas 使用；缺省时用本轮最优代替
+    """
+    if params.deposit not in DEPOSIT_STRATEGIES:
+        raise ValueError(f"未知的沉积策略 deposit={params.deposit!r}，可选：{DEPOSIT_STRATEGIES}")
+
+    paths = np.asarray(paths, dtype=np.int64)
+    g = np.asarray(g, dtype=float)
+    Q = np.asarray(Q, dtype=float)
+    if best is None and len(Q):
+        b = int(np.argmax(Q))
+        best = (paths[b], g[b], float(Q[b]))
+
+    # 按策略确定参与沉积的解与倍数
+    if params.deposit == "all":
+        scale = np.ones(len(Q))
+    elif params.deposit == "elitist":
+        scale = np.ones(len(Q))
+        paths, g, Q, scale = _append_best(paths, g, Q, scale, best, params.elite_weight)
+    elif params.deposit == "rank":
+        order = np.argsort(-Q, kind="stable")[:max(params.rank_w - 1, 0)]
+        paths, g, Q = paths[order], g[order], Q[order]
+        scale = (params.rank_w - 1.0 - np.arange(len(order), dtype=float))
+        paths, g, Q, scale = _append_best(paths, g, Q, scale, best, float(params.rank_w))
+    else:  # mmas
+        if params.mmas_global_best and best is not None:
+            paths, g, Q = best[0][None, :], best[1][None, :], np.array([best[2]])
+        else:
+            b = int(np.argmax(Q))
+            paths, g, Q = paths[b:b + 1], g[b:b + 1], Q[b:b + 1]
+        scale = np.ones(1)
+
+    sparse = isinstance(tau, SparseTau)
+    lazy = isinstance(tau, LazyTau)
+
+    # 式(2-15)
+    if lazy:
+        tau.evaporate(1.0 - params.rho)
+    elif sparse:
+        tau.data *= (1.0 - params.rho)
+        tau.background *= (1.0 - params.rho)
+    else:
+        tau *= (1.0 - params.rho)
+
+    # 式(2-16)(2-17)：边 (p_k, p_{k+1}) 的增量 Q * g_{p_k} / (Σg + eps)
+    share = (scale * Q / (g.sum(axis=1) + params.eps))[:, None] * g
+    rows = paths[:, :-1].ravel()
+    cols = paths[:, 1:].ravel()
+    amounts = share[:, :-1].ravel()
+    if params.deposit_start:
+        start_row = tau.shape[0] - 1
+        rows = np.concatenate([np.full(len(paths), start_row, dtype=np.int64), rows])
+        cols = np.concatenate([paths[:, 0], cols])
+        amounts = np.concatenate([share[:, 0], amounts])
+
+    # 式(2-18)
+    if lazy:
+        tau.deposit(rows, cols, amounts, 1.0 - params.rho)
+    elif sparse:
+        np.add.at(tau.data, tau.positions(rows, cols), amounts)
+        np.clip(tau.data, params.tau_min, params.tau_max, out=tau.data)
+        tau.background = min(max(tau.background, params.tau_min), params.tau_max)
+    else:
+        np.add.at(tau, (rows, cols), amounts)
+        np.clip(tau, params.tau_min, params.tau_max, out=tau)
+
+
+def _append_best(paths, g, Q, scale, best, weight):
+    if best is None or weight <= 0:
+        return paths, g, Q, scale
+    bp, bg, bq = best
+    return (np.vstack([paths, bp[None, :]]),
+            np.vstack([g, bg[None, :]]),
+            np.append(Q, bq),
+            np.append(scale, weight))
+
+
+def pheromone_entropy(tau: Union[np.ndarray, SparseTau, LazyTau]) -> float:
+    """
+    信息素的平均归一化熵 ∈ [0,1]：每行归一化为转移分布后取 Shannon 熵 / ln(n)，再对行求平均。
+    1 表示均匀（尚未学习），越接近 0 表示各行越集中于少数转移。
+    SparseTau 按稠密矩阵计算（不可达位置取 background）。
+    """
+    n = tau.shape[1]
+    if n <= 1:
+        return 0.0
+    if isinstance(tau, SparseTau):
+        return _sparse_entropy(tau)
+    if isinstance(tau, LazyTau):
+        tau = tau.to_dense()
+    p = tau / tau.sum(axis=1, keepdims=True)
+    h = -np.sum(p * np.log(np.where(p > 0, p, 1.0)), axis=1)
+    return float(np.mean(h) / np.log(n))
+
+
+def _sparse_entropy(tau: SparseTau) -> float:
+    n = tau.n
+    n_rows = n + 1
+    missing = n - np.diff(tau.indptr)              # 每行取 background 的位置数
+    b = tau.background
+    total = np.bincount(tau.row_of, weights=tau.data, minlength=n_rows) + missing * b
+    p = tau.data / total[tau.row_of]
+    h = -np.bincount(tau.row_of, weights=p * np.log(np.where(p > 0, p, 1.0)), minlength=n_rows)
+    pb = b / total
+    h -= missing * pb * np.log(np.where(pb > 0, pb, 1.0))
+    return float(np.mean(h) / np.log(n))
 
 
 def update_pheromone(points: Dict[int, KnowledgePoint],
@@ -16,15 +150,12 @@ def update_pheromone(points: Dict[int, KnowledgePoint],
                      idx: Dict[int, int],
                      solutions: List[Tuple[List[int], Dict[int, float], float, float, Dict[int, float]]],
                      params: UPKSTParams) -> None:
-    # 式(2-15)
-    tau *= (1.0 - params.rho)
-
-    delta = np.zeros_like(tau)
-    for path, t_map, L, Q, g_map in solutions:
-        sum_g = sum(g_map.values()) + params.eps
-        for i, j in zip(path[:-1], path[1:]):
-            delta[idx[i], idx[j]] += Q * g_map.get(i, 0.0) / sum_g
-
-    # 式(2-18)
-    tau += delta
-    np.clip(tau, params.tau_min, params.tau_max, out=tau)
+    """兼容旧接口：solutions 为 (path, t_map, L, Q, g_map) 列表，转换为数组后调用 deposit_pheromone。"""
+    if not solutions:
+        tau *= (1.0 - params.rho)
+        np.clip(tau, params.tau_min, params.tau_max, out=tau)
+        return
+    paths = np.array([[idx[i] for i in path] for path, *_ in solutions], dtype=np.int64)
+    g = np.array([[g_map.get(i, 0.0) for i in path] for path, _, _, _, g_map in solutions], dtype=float)
+    Q = np.array([q for _, _, _, q, _ in solutions], dtype=float)
+    deposit_pheromone(tau, paths, g, Q, params)
@@ -0,0 +1,83 @@
+"""
+信息素热启动缓存：
+- 掌握度相近的学生学到的 τ 结构几乎相同，月度更新时掌握度也只小幅变化；
+- 以粗粒度画像签名（量化后的 A_s 与掌握度向量）为键保存最终 τ，LRU 淘汰；
+- 查找时先找签名完全相同的项，否则取签名 L1 距离（以量化步数计）最近的项，
+  超过 max_distance 视为未命中（0 表示只接受完全相同的签名）。
+
+取到的 τ 作为 run_upkst(tau_init=...) 的初值，通常可以用少得多的迭代轮数收敛。
+收敛后的 τ 往往过于集中在上一个学生的最优路径上，直接沿用会限制探索：
+get 返回前按 smoothing 在对数尺度上向 tau0 收缩，τ' = tau0^s · τ^(1-s)（s=0 原样返回，s=1 即冷启动）。
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+
+from .sparse_tau import SparseTau
+
+
+class PheromoneCache:
+    def __init__(self, capacity: int = 64, mastery_step: float = 0.1, ability_step: float = 0.1,
+                 max_distance: float = float("inf"), smoothing: float = 0.5, tau0: float = 1.0):
+        if capacity <= 0:
+            raise ValueError(f"capacity 必须为正数，实际为 {capacity}")
+        if mastery_step <= 0 or ability_step <= 0:
+            raise ValueError("mastery_step / ability_step 必须为正数")
+        if not 0.0 <= smoothing <= 1.0:
+            raise ValueError(f"smoothing 应在 [0, 1] 内，实际为 {smoothing}")
+        self.capacity = capacity
+        self.mastery_step = mastery_step
+        self.ability_step = ability_step
+        self.max_distance = max_distance
+        self.smoothing = smoothing
+        self.tau0 = tau0
+        self._store: "OrderedDict[Tuple[int, ...], np.ndarray]" = OrderedDict()
+        self.hits = 0      # 签名完全相同
+        self.near = 0      # 取最近邻
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def signature(self, mastery: np.ndarray, A: float) -> Tuple[int, ...]:
+        """(round(A/ability_step), round(m_1/mastery_step), ...)"""
+        m = np.rint(np.asarray(mastery, dtype=float) / self.mastery_step).astype(np.int64)
+        return (int(np.rint(float(A) / self.ability_step)),) + tuple(m.tolist())
+
+    def get(self, mastery: np.ndarray, A: float) -> Optional[np.ndarray]:
+        """返回最近签名的 τ（已平滑的新数组）；缓存为空或距离过远时返回 None"""
+        key = self.signature(mastery, A)
+        tau = self._store.get(key)
+        if tau is not None:
+            self._store.move_to_end(key)
+            self.hits += 1
+            return self._smooth(tau)
+
+        # 从最近使用的开始，距离相同时优先较新的项
+        keys = [k for k in reversed(self._store) if len(k) == len(key)]
+        if keys:
+            dist = np.abs(np.array(keys, dtype=np.int64) - np.array(key, dtype=np.int64)).sum(axis=1)
+            j = int(np.argmin(dist))
+            if dist[j] <= self.max_distance:
+                self._store.move_to_end(keys[j])
+                self.near += 1
+                return self._smooth(self._store[keys[j]])
+        self.misses += 1
+        return None
+
+    def _smooth(self, tau):
+        s = self.smoothing
+        if s == 0.0:
+            return tau.copy()
+        if isinstance(tau, SparseTau):
+            bg = float(np.exp((1.0 - s) * np.log(tau.background) + s * np.log(self.tau0)))
+            return tau.with_data(np.exp((1.0 - s) * np.log(tau.data) + s * np.log(self.tau0)), bg)
+        return np.exp((1.0 - s) * np.log(tau) + s * np.log(self.tau0))
+
+    def put(self, mastery: np.ndarray, A: float, tau: np.ndarray) -> None:
+        key = self.signature(mastery, A)
+        self._store[key] = tau.copy() if isinstance(tau, SparseTau) else np.array(tau, dtype=float)
+        self._store.move_to_end(key)
+        while len(self._store) > self.capacity:
+            self._store.popitem(last=False)
@@ -0,0 +1,71 @@
+"""
+数组化的知识点表：
+- w / d / t_base 为连续的 numpy 数组（按 kid 升序，与 tau 的列一致），先修关系为预编译的 CSR 图；
+- mastery 为单独的每学生向量：切换学生只需 with_mastery(vec)，其余数组共享，不再逐个重建 KnowledgePoint；
+- from_points / to_points 在 Dict[int, KnowledgePoint] 与 PointTable 之间转换，旧的字典接口照常可用。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+
+from .types import KnowledgePoint
+from .graph import PrereqGraph, compile_prereqs
+
+
+@dataclass(frozen=True, eq=False)
+class PointTable:
+    kids: Tuple[int, ...]
+    names: Tuple[str, ...]
+    w: np.ndarray
+    d: np.ndarray
+    t_base: np.ndarray
+    mastery: np.ndarray
+    prereqs: Tuple[Tuple[int, ...], ...]
+    graph: PrereqGraph
+
+    @property
+    def n(self) -> int:
+        return len(self.kids)
+
+    @property
+    def idx(self) -> Dict[int, int]:
+        return self.graph.idx
+
+    @classmethod
+    def from_points(cls, points: Dict[int, KnowledgePoint], graph: Optional[PrereqGraph] = None) -> "PointTable":
+        """graph：可选的已编译先修图（须由同一组 kid/prereqs 编译）"""
+        if graph is None:
+            graph = compile_prereqs(points)
+        kps = [points[kid] for kid in graph.kids]
+        return cls(
+            kids=graph.kids,
+            names=tuple(kp.name for kp in kps),
+            w=np.array([kp.w for kp in kps], dtype=float),
+            d=np.array([kp.d for kp in kps], dtype=float),
+            t_base=np.array([kp.t_base for kp in kps], dtype=float),
+            mastery=np.array([kp.mastery for kp in kps], dtype=float),
+            prereqs=tuple(tuple(kp.prereqs) for kp in kps),
+            graph=graph,
+        )
+
+    def to_points(self) -> Dict[int, KnowledgePoint]:
+        """适配旧接口：还原为 Dict[int, KnowledgePoint]"""
+        return {
+            kid: KnowledgePoint(kid=kid, name=name, w=float(w), d=float(d), t_base=float(tb),
+                                mastery=float(m), prereqs=pre)
+            for kid, name, w, d, tb, m, pre in zip(self.kids, self.names, self.w, self.d,
+                                                   self.t_base, self.mastery, self.prereqs)
+        }
+
+    def with_mastery(self, mastery: np.ndarray) -> "PointTable":
+        """换一个学生：只替换掌握度向量，其余数组与先修图共享"""
+        mastery = np.asarray(mastery, dtype=float)
+        if mastery.shape != (self.n,):
+            raise ValueError(f"mastery 形状应为 ({self.n},)，实际为 {mastery.shape}")
+        return replace(self, mastery=mastery)
+
+
+def as_point_table(points: Union[Dict[int, KnowledgePoint], PointTable],
+                   graph: Optional[PrereqGraph] = None) -> PointTable:
+    return points if isinstance(points, PointTable) else PointTable.from_points(points, graph=graph)
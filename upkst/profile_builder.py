@@ -4,9 +4,11 @@
 
 默认输入格式（长表 raw_long）：
   student_id, exam_id, exam_date, exam_weight, kp_name, score, full_score, score_rate
+
+build_profiles_chunked：对超出内存的 CSV 分块两遍扫描，内存只与分组数有关、与行数无关。
 """
 from __future__ import annotations
-from typing import Tuple, Dict, Optional
+from typing import Iterator, Tuple, Dict, Optional
 import numpy as np
 import pandas as pd
 import math
@@ -35,53 +37,68 @@ def load_long_table(path: str, sheet: str = "raw_long") -> pd.DataFrame:
     return df
 
 
-def compute_time_weight(exam_date: pd.Series, exam_weight: pd.Series, decay_lambda: float) -> np.ndarray:
+def compute_time_weight(exam_date: pd.Series, exam_weight: pd.Series, decay_lambda: float,
+                        now: Optional[pd.Timestamp] = None) -> np.ndarray:
     """
     w_e = exam_weight * exp(-lambda * Δdays)
-    其中“当前时点”默认取数据中的最新 exam_date。
+    其中“当前时点”默认取数据中的最新 exam_date（分块计算时由调用方传入全局最新日期）。
     """
     dates = pd.to_datetime(exam_date)
-    now = dates.max()
+    if now is None:
+        now = dates.max()
     delta_days = (now - dates).dt.days.astype(float)
     return exam_weight.to_numpy(dtype=float) * np.exp(-decay_lambda * delta_days)
 
 
+def _prepare_long(df_long: pd.DataFrame) -> pd.DataFrame:
+    """只取用到的列（唯一一次拷贝），并补出 score_rate。"""
+    cols = ["student_id", "exam_id", "exam_date", "exam_weight", "kp_name"]
+    if "score_rate" in df_long.columns:
+        df = df_long[cols + ["score_rate"]].copy()
+    elif "score" in df_long.columns and "full_score" in df_long.columns:
+        df = df_long[cols].copy()
+        df["score_rate"] = df_long["score"].to_numpy(dtype=float) / df_long["full_score"].to_numpy(dtype=float)
+    else:
+        raise ValueError("需要 score_rate 或 (score, full_score) 列")
+    return df
+
+
+def _floor_std(std: pd.Series) -> pd.Series:
+    std = std.fillna(0.0)
+    return std.where(std > 1e-6, 1e-6)
+
+
 def build_mastery(df_long: pd.DataFrame, params: ProfileParams) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     输出：
-      mastery_long: [student_id, kp_name, mastery]
+      mastery_long: [student_id, kp_name, mastery, n_obs]
       debug_exam_kp_stats: [exam_id, kp_name, mean, std, n]
     """
-    df = df_long.copy()
-    if "score_rate" not in df.columns:
-        if "score" in df.columns and "full_score" in df.columns:
-            df["score_rate"] = df["score"] / df["full_score"]
-        else:
-            raise ValueError("需要 score_rate 或 (score, full_score) 列")
+    df = _prepare_long(df_long)
 
     # 计算时间权重
-    df["time_w"] = compute_time_weight(df["exam_date"], df["exam_weight"], params.decay_lambda)
+    time_w = compute_time_weight(df["exam_date"], df["exam_weight"], params.decay_lambda)
 
-    # 考试内、知识点内标准化
-    grp = df.groupby(["exam_id", "kp_name"])
-    stats = grp["score_rate"].agg(["mean", "std", "count"]).reset_index()
-    stats["std"] = stats["std"].fillna(0.0)
-    stats["std"] = stats["std"].where(stats["std"] > 1e-6, 1e-6)
+    # 考试内、知识点内标准化（transform 直接按行回填，不再 merge）
+    grp = df.groupby(["exam_id", "kp_name"], sort=True, observed=True)["score_rate"]
+    stats = grp.agg(["mean", "std", "count"]).reset_index()
+    stats["std"] = _floor_std(stats["std"])
 
-    df = df.merge(stats, on=["exam_id", "kp_name"], how="left")
-    z = (df["score_rate"] - df["mean"]) / (df["std"] + params.eps)
-    df["m_hat"] = _sigmoid(params.gamma * z.to_numpy())
+    mean = grp.transform("mean").to_numpy(dtype=float)
+    std = _floor_std(grp.transform("std")).to_numpy(dtype=float)
+    z = (df["score_rate"].to_numpy(dtype=float) - mean) / (std + params.eps)
+    m_hat = _sigmoid(params.gamma * z)
 
     # 聚合到 m_{s,i}
     # m_{s,i} = Σ w * m_hat / Σ w
-    agg = df.groupby(["student_id", "kp_name"]).apply(
-        lambda g: pd.Series({
-            "mastery": float(np.sum(g["time_w"] * g["m_hat"]) / (np.sum(g["time_w"]) + params.eps)),
-            "n_obs": int(len(g)),
-        })
+    df["wm"] = time_w * m_hat
+    df["time_w"] = time_w
+    agg = df.groupby(["student_id", "kp_name"], sort=True, observed=True).agg(
+        num=("wm", "sum"), den=("time_w", "sum"), n_obs=("wm", "size"),
     ).reset_index()
+    agg["mastery"] = agg["num"].to_numpy() / (agg["den"].to_numpy() + params.eps)
 
-    mastery_long = agg[["student_id", "kp_name", "mastery", "n_obs"]].copy()
+    mastery_long = agg[["student_id", "kp_name", "mastery", "n_obs"]]
 
     debug_stats = stats.rename(columns={"count": "n"})
     return mastery_long, debug_stats
@@ -95,29 +112,108 @@ def build_ability(df_long: pd.DataFrame, params: ProfileParams) -> pd.DataFrame:
     3) 时间衰减加权得到 z_s
     4) A_s = exp(kappa * z_s)
     """
-    df = df_long.copy()
-    if "score_rate" not in df.columns:
-        if "score" in df.columns and "full_score" in df.columns:
-            df["score_rate"] = df["score"] / df["full_score"]
-        else:
-            raise ValueError("需要 score_rate 或 (score, full_score) 列")
+    df = _prepare_long(df_long)
 
     # 考试内总体表现
-    overall = df.groupby(["student_id", "exam_id", "exam_date", "exam_weight"])["score_rate"].mean().reset_index()
+    overall = df.groupby(["student_id", "exam_id", "exam_date", "exam_weight"], sort=True, observed=True)["score_rate"].mean().reset_index()
     overall = overall.rename(columns={"score_rate": "overall_rate"})
-    overall["time_w"] = compute_time_weight(overall["exam_date"], overall["exam_weight"], params.decay_lambda)
+    time_w = compute_time_weight(overall["exam_date"], overall["exam_weight"], params.decay_lambda)
 
     # 考试内标准化
-    st = overall.groupby("exam_id")["overall_rate"].agg(["mean", "std"]).reset_index()
-    st["std"] = st["std"].fillna(0.0)
-    st["std"] = st["std"].where(st["std"] > 1e-6, 1e-6)
-    overall = overall.merge(st, on="exam_id", how="left")
-    overall["z"] = (overall["overall_rate"] - overall["mean"]) / (overall["std"] + params.eps)
+    grp = overall.groupby("exam_id", observed=True)["overall_rate"]
+    mean = grp.transform("mean").to_numpy(dtype=float)
+    std = _floor_std(grp.transform("std")).to_numpy(dtype=float)
+    z = (overall["overall_rate"].to_numpy(dtype=float) - mean) / (std + params.eps)
 
     # 时间加权聚合
-    zs = overall.groupby("student_id").apply(
-        lambda g: float(np.sum(g["time_w"] * g["z"]) / (np.sum(g["time_w"]) + params.eps))
-    ).reset_index(name="z_s")
+    overall["wz"] = time_w * z
+    overall["time_w"] = time_w
+    zs = overall.groupby("student_id", sort=True, observed=True).agg(num=("wz", "sum"), den=("time_w", "sum")).reset_index()
+    zs["z_s"] = zs["num"].to_numpy() / (zs["den"].to_numpy() + params.eps)
 
     zs["A_s"] = np.exp(params.kappa * zs["z_s"].to_numpy(dtype=float))
     return zs[["student_id", "z_s", "A_s"]]
+
+
+def _iter_csv_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    for chunk in pd.read_csv(path, encoding="utf-8-sig", chunksize=chunksize):
+        chunk["exam_date"] = pd.to_datetime(chunk["exam_date"])
+        yield _prepare_long(chunk)
+
+
+def _accumulate(acc: Optional[pd.DataFrame], part: pd.DataFrame) -> pd.DataFrame:
+    return part if acc is None else acc.add(part, fill_value=0.0)
+
+
+def build_profiles_chunked(path: str, params: ProfileParams,
+                           chunksize: int = 1_000_000) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    分块两遍扫描 CSV，结果与 build_mastery + build_ability 一致（浮点误差内）。
+    第一遍：按 (exam, kp) 累计 count/sum/sum_sq，并求全局最新 exam_date；
+    第二遍：按 (student, kp) 累计 Σw·m_hat、Σw 与观测数，按 (student, exam) 累计总体得分率的和与个数。
+    返回 (mastery_long, debug_exam_kp_stats, ability)。
+    """
+    if path.lower().endswith((".xlsx", ".xls")):
+        raise ValueError("分块模式只支持 CSV 输入")
+
+    # 第一遍
+    kp_acc = None
+    now = None
+    for df in _iter_csv_chunks(path, chunksize):
+        df["sq"] = df["score_rate"] ** 2
+        part = df.groupby(["exam_id", "kp_name"], observed=True).agg(
+            count=("score_rate", "count"), sum=("score_rate", "sum"), sum_sq=("sq", "sum"))
+        kp_acc = _accumulate(kp_acc, part)
+        chunk_max = df["exam_date"].max()
+        now = chunk_max if now is None or chunk_max > now else now
+    if kp_acc is None:
+        raise ValueError(f"输入为空：{path}")
+
+    kp_acc = kp_acc.sort_index()
+    n = kp_acc["count"].to_numpy(dtype=float)
+    mean = kp_acc["sum"].to_numpy() / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.maximum(kp_acc["sum_sq"].to_numpy() - n * mean ** 2, 0.0) / (n - 1.0)
+    stats = pd.DataFrame({"mean": mean, "std": np.where(n > 1, np.sqrt(var), np.nan), "count": n.astype(np.int64)},
+                         index=kp_acc.index)
+    stats["std"] = _floor_std(stats["std"])
+
+    # 第二遍
+    m_acc = None
+    o_acc = None
+    for df in _iter_csv_chunks(path, chunksize):
+        st = stats.reindex(pd.MultiIndex.from_arrays([df["exam_id"], df["kp_name"]]))
+        z = (df["score_rate"].to_numpy(dtype=float) - st["mean"].to_numpy()) / (st["std"].to_numpy() + params.eps)
+        time_w = compute_time_weight(df["exam_date"], df["exam_weight"], params.decay_lambda, now=now)
+        df["wm"] = time_w * _sigmoid(params.gamma * z)
+        df["time_w"] = time_w
+        part = df.groupby(["student_id", "kp_name"], observed=True).agg(
+            num=("wm", "sum"), den=("time_w", "sum"), n_obs=("wm", "size"))
+        m_acc = _accumulate(m_acc, part)
+
+        part = df.groupby(["student_id", "exam_id", "exam_date", "exam_weight"], observed=True).agg(
+            rate_sum=("score_rate", "sum"), rate_n=("score_rate", "count"))
+        o_acc = _accumulate(o_acc, part)
+
+    m_acc = m_acc.sort_index().reset_index()
+    m_acc["mastery"] = m_acc["num"].to_numpy() / (m_acc["den"].to_numpy() + params.eps)
+    m_acc["n_obs"] = m_acc["n_obs"].astype(np.int64)
+    mastery_long = m_acc[["student_id", "kp_name", "mastery", "n_obs"]]
+
+    debug_stats = stats.reset_index().rename(columns={"count": "n"})
+
+    # A_s：(student, exam) 的组数有界，直接在内存里完成考试内标准化
+    overall = o_acc.sort_index().reset_index()
+    overall["overall_rate"] = overall["rate_sum"] / overall["rate_n"]
+    time_w = compute_time_weight(overall["exam_date"], overall["exam_weight"], params.decay_lambda, now=now)
+    grp = overall.groupby("exam_id", observed=True)["overall_rate"]
+    z = (overall["overall_rate"].to_numpy(dtype=float) - grp.transform("mean").to_numpy(dtype=float)) \
+        / (_floor_std(grp.transform("std")).to_numpy(dtype=float) + params.eps)
+    overall["wz"] = time_w * z
+    overall["time_w"] = time_w
+    zs = overall.groupby("student_id", sort=True, observed=True).agg(num=("wz", "sum"), den=("time_w", "sum")).reset_index()
+    zs["z_s"] = zs["num"].to_numpy() / (zs["den"].to_numpy() + params.eps)
+    zs["A_s"] = np.exp(params.kappa * zs["z_s"].to_numpy(dtype=float))
+    ability = zs[["student_id", "z_s", "A_s"]]
+
+    return mastery_long, debug_stats, ability
@@ -0,0 +1,138 @@
+"""
+画像增量更新：新的一次考试到来时，不必对全部历史重跑 build_profiles_from_excel.py。
+
+时间衰减权重 w = exam_weight * exp(-λ Δdays) 可以分解：当“当前时点”从 ref 前移到 ref'，
+所有已有权重同乘 exp(-λ (ref' - ref))。因此只需持久化
+  - 每个 (student, kp) 的 Σ w·m_hat、Σ w 与观测数（掌握度 m = Σw·m_hat / Σw）
+  - 每个 student 的 Σ w·z、Σ w（能力 z_s = Σw·z / Σw，A_s = exp(κ z_s)）
+  - 参考日期 ref 与已并入的 exam_id
+新考试到来时先把旧的和按比例缩放，再只对新考试做考试内标准化并累加。
+
+注意：标准化在考试内进行，所以每次并入的必须是完整的新考试（exam_id 不能已在状态中）。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from typing import FrozenSet, Tuple
+import json
+
+import numpy as np
+import pandas as pd
+
+from .profile_builder import ProfileParams, compute_time_weight, _prepare_long, _floor_std, _sigmoid
+
+
+@dataclass(frozen=True)
+class ProfileState:
+    ref_date: pd.Timestamp
+    mastery_sums: pd.DataFrame   # index (student_id, kp_name)，列 num/den/n_obs
+    ability_sums: pd.DataFrame   # index student_id，列 num/den
+    exam_ids: FrozenSet[str]
+    params: ProfileParams
+
+
+def _fold_exams(df: pd.DataFrame, params: ProfileParams,
+                ref_date: pd.Timestamp) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """把若干完整考试按参考日期 ref_date 折算成 (mastery_sums, ability_sums)。"""
+    # 状态文件中 student_id 以字符串保存：统一为 str，Excel 读出的整数学号才能与已有状态合并
+    df["student_id"] = df["student_id"].astype(str)
+    # 掌握度：考试内、知识点内标准化
+    time_w = compute_time_weight(df["exam_date"], df["exam_weight"], params.decay_lambda, now=ref_date)
+    grp = df.groupby(["exam_id", "kp_name"], observed=True)["score_rate"]
+    z = (df["score_rate"].to_numpy(dtype=float) - grp.transform("mean").to_numpy(dtype=float)) \
+        / (_floor_std(grp.transform("std")).to_numpy(dtype=float) + params.eps)
+    df["wm"] = time_w * _sigmoid(params.gamma * z)
+    df["time_w"] = time_w
+    m = df.groupby(["student_id", "kp_name"], sort=True, observed=True).agg(
+        num=("wm", "sum"), den=("time_w", "sum"), n_obs=("wm", "size"))
+
+    # 能力：考试内总体表现的标准化
+    overall = df.groupby(["student_id", "exam_id", "exam_date", "exam_weight"], sort=True, observed=True)["score_rate"] \
+        .mean().reset_index(name="overall_rate")
+    ow = compute_time_weight(overall["exam_date"], overall["exam_weight"], params.decay_lambda, now=ref_date)
+    grp = overall.groupby("exam_id", observed=True)["overall_rate"]
+    z = (overall["overall_rate"].to_numpy(dtype=float) - grp.transform("mean").to_numpy(dtype=float)) \
+        / (_floor_std(grp.transform("std")).to_numpy(dtype=float) + params.eps)
+    overall["wz"] = ow * z
+    overall["time_w"] = ow
+    a = overall.groupby("student_id", sort=True, observed=True).agg(num=("wz", "sum"), den=("time_w", "sum"))
+    return m, a
+
+
+def state_from_long(df_long: pd.DataFrame, params: ProfileParams) -> ProfileState:
+    """由完整历史 raw_long 建立初始状态（结果与 build_mastery/build_ability 一致）。"""
+    df = _prepare_long(df_long)
+    ref_date = pd.to_datetime(df["exam_date"]).max()
+    m, a = _fold_exams(df, params, ref_date)
+    return ProfileState(ref_date=ref_date, mastery_sums=m, ability_sums=a,
+                        exam_ids=frozenset(map(str, df["exam_id"].unique())), params=params)
+
+
+def update_profiles(state: ProfileState, new_exam_rows: pd.DataFrame) -> ProfileState:
+    """并入新考试：旧的加权和按 exp(-λ Δdays) 缩放，再累加新考试的贡献。"""
+    df = _prepare_long(new_exam_rows)
+    df["exam_date"] = pd.to_datetime(df["exam_date"])
+    new_ids = frozenset(map(str, df["exam_id"].unique()))
+    dup = new_ids & state.exam_ids
+    if dup:
+        raise ValueError(f"考试已并入状态，不能重复并入：{sorted(dup)}")
+
+    ref_date = max(state.ref_date, df["exam_date"].max())
+    factor = float(np.exp(-state.params.decay_lambda * float((ref_date - state.ref_date).days)))
+
+    m_old = state.mastery_sums.copy()
+    m_old[["num", "den"]] *= factor
+    a_old = state.ability_sums * factor
+
+    m_new, a_new = _fold_exams(df, state.params, ref_date)
+    m = m_old.add(m_new, fill_value=0.0).sort_index()
+    m["n_obs"] = m["n_obs"].astype(np.int64)
+    a = a_old.add(a_new, fill_value=0.0).sort_index()
+
+    return replace(state, ref_date=ref_date, mastery_sums=m, ability_sums=a, exam_ids=state.exam_ids | new_ids)
+
+
+def profiles_from_state(state: ProfileState) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """由状态得到 (mastery_long, ability)，列与 build_mastery/build_ability 相同。"""
+    eps = state.params.eps
+    m = state.mastery_sums.reset_index()
+    m["mastery"] = m["num"].to_numpy() / (m["den"].to_numpy() + eps)
+    mastery_long = m[["student_id", "kp_name", "mastery", "n_obs"]]
+
+    a = state.ability_sums.reset_index()
+    a["z_s"] = a["num"].to_numpy() / (a["den"].to_numpy() + eps)
+    a["A_s"] = np.exp(state.params.kappa * a["z_s"].to_numpy(dtype=float))
+    return mastery_long, a[["student_id", "z_s", "A_s"]]
+
+
+def save_profile_state(state: ProfileState, path: str) -> None:
+    m = state.mastery_sums.reset_index()
+    a = state.ability_sums.reset_index()
+    np.savez(
+        path,
+        ref_date=np.array(str(state.ref_date)),
+        params=np.array(json.dumps(state.params.__dict__)),
+        exam_ids=np.array(sorted(state.exam_ids), dtype=str),
+        m_student=m["student_id"].to_numpy(dtype=str),
+        m_kp=m["kp_name"].to_numpy(dtype=str),
+        m_num=m["num"].to_numpy(dtype=float),
+        m_den=m["den"].to_numpy(dtype=float),
+        m_n_obs=m["n_obs"].to_numpy(dtype=np.int64),
+        a_student=a["student_id"].to_numpy(dtype=str),
+        a_num=a["num"].to_numpy(dtype=float),
+        a_den=a["den"].to_numpy(dtype=float),
+    )
+
+
+def load_profile_state(path: str) -> ProfileState:
+    with np.load(path, allow_pickle=False) as z:
+        m = pd.DataFrame({"num": z["m_num"], "den": z["m_den"], "n_obs": z["m_n_obs"]},
+                         index=pd.MultiIndex.from_arrays([z["m_student"], z["m_kp"]], names=["student_id", "kp_name"]))
+        a = pd.DataFrame({"num": z["a_num"], "den": z["a_den"]},
+                         index=pd.Index(z["a_student"], name="student_id"))
+        return ProfileState(
+            ref_date=pd.Timestamp(str(z["ref_date"])),
+            mastery_sums=m,
+            ability_sums=a,
+            exam_ids=frozenset(z["exam_ids"].tolist()),
+            params=ProfileParams(**json.loads(str(z["params"]))),
+        )
@@ -0,0 +1,67 @@
+"""
+紧凑的二进制画像存储（.npz）：替代 CSV/XLSX 往返。
+- mastery: (学生 × 知识点) 掌握度矩阵，缺失为 NaN（由使用方回填）
+- n_obs:   同形状的观测数矩阵
+- kp_names / student_ids: 列/行索引
+- z_s / A_s: 能力向量（与 student_ids 对齐）
+一次 np.load 即可拿到整个群体的画像，不再逐行解析 utf-8-sig CSV。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+PROFILE_STORE_NAME = "profiles.npz"
+
+
+@dataclass(frozen=True, eq=False)
+class ProfileMatrix:
+    student_ids: np.ndarray
+    kp_names: np.ndarray
+    mastery: np.ndarray
+    n_obs: np.ndarray
+    z_s: np.ndarray
+    A_s: np.ndarray
+
+
+def profiles_to_matrix(mastery_long: pd.DataFrame, ability: pd.DataFrame) -> ProfileMatrix:
+    """长表 → 矩阵；行顺序与 ability 一致，列按知识点名排序。"""
+    student_ids = ability["student_id"].to_numpy()
+    kp_names = np.array(sorted(mastery_long["kp_name"].unique()))
+
+    rows = pd.Index(student_ids).get_indexer(mastery_long["student_id"])
+    cols = pd.Index(kp_names).get_indexer(mastery_long["kp_name"])
+    keep = rows >= 0
+
+    mastery = np.full((len(student_ids), len(kp_names)), np.nan)
+    n_obs = np.zeros((len(student_ids), len(kp_names)), dtype=np.int64)
+    mastery[rows[keep], cols[keep]] = mastery_long["mastery"].to_numpy(dtype=float)[keep]
+    n_obs[rows[keep], cols[keep]] = mastery_long["n_obs"].to_numpy()[keep]
+
+    return ProfileMatrix(
+        student_ids=student_ids.astype(str),
+        kp_names=kp_names.astype(str),
+        mastery=mastery,
+        n_obs=n_obs,
+        z_s=ability["z_s"].to_numpy(dtype=float),
+        A_s=ability["A_s"].to_numpy(dtype=float),
+    )
+
+
+def save_profile_matrix(pm: ProfileMatrix, path: str) -> None:
+    np.savez(path, student_ids=pm.student_ids, kp_names=pm.kp_names, mastery=pm.mastery,
+             n_obs=pm.n_obs, z_s=pm.z_s, A_s=pm.A_s)
+
+
+def load_profile_matrix(path: str) -> ProfileMatrix:
+    with np.load(path, allow_pickle=False) as z:
+        return ProfileMatrix(
+            student_ids=z["student_ids"],
+            kp_names=z["kp_names"],
+            mastery=z["mastery"],
+            n_obs=z["n_obs"],
+            z_s=z["z_s"],
+            A_s=z["A_s"],
+        )
@@ -0,0 +1,37 @@
+"""
+随机数流（numpy SeedSequence）：
+- 学生：student_seed(base_seed, student_id) 由基础种子与 student_id 确定性派生；
+- 蚂蚁：ant_streams(seed, n_ants, seed_key) 为每只蚂蚁派生一条子流，
+  即 SeedSequence(entropy=seed, spawn_key=seed_key + (ant,))；
+- 迭代：每只蚂蚁每轮恰好消耗 n 个均匀数（每步一个），第 it 轮用的是其子流的第 (it-1)·n .. it·n-1 个数，
+  因此 (学生, 蚂蚁, 迭代) 唯一确定所用的随机数。
+
+"numpy" 与 "batch" 引擎按同样的规则消费这些子流，结果逐位一致；蚂蚁按顺序、批量或分到不同进程构造，
+只要各自持有自己的子流，结果都相同。seed_key 用于区分同一种子下的不同运行（如多种群的各个种群）。
+"python" 引擎仍使用 random.Random(params.seed)，以复现旧结果。
+"""
+from __future__ import annotations
+from typing import List, Sequence, Tuple
+import zlib
+
+import numpy as np
+
+
+def student_seed(base_seed: int, sid) -> int:
+    """由基础种子与 student_id 确定性派生每个学生的种子（与运行顺序、进程无关）。"""
+    key = zlib.crc32(str(sid).encode("utf-8"))
+    return int(np.random.SeedSequence([int(base_seed), key]).generate_state(1)[0])
+
+
+def ant_streams(seed: int, n_ants: int, seed_key: Tuple[int, ...] = ()) -> List[np.random.Generator]:
+    """每只蚂蚁一条独立子流：spawn_key = seed_key + (ant,)"""
+    root = np.random.SeedSequence(entropy=int(seed), spawn_key=tuple(int(k) for k in seed_key))
+    return [np.random.default_rng(child) for child in root.spawn(n_ants)]
+
+
+def draw_uniforms(streams: Sequence[np.random.Generator], n: int) -> np.ndarray:
+    """从各蚂蚁的子流各取 n 个均匀数，返回 (n_ants, n)；与逐步调用 stream.random() 得到的序列相同"""
+    out = np.empty((len(streams), n))
+    for a, g in enumerate(streams):
+        g.random(out=out[a])
+    return out
@@ -1,59 +1,433 @@
 """
 UPKST 主流程：
-- ACO 构造路径 P
+- ACO 构造路径 P（可选局部搜索，见 local_search.py）
 - KKT 求 t
 - 计算 U/L/Q
 - 信息素更新
+
+run_upkst_batch：群体级接口，对 (学生 × 知识点) 掌握度矩阵按有效画像去重后逐一求解。
+run_upkst_islands：单个学生的多蚁群（岛屿模型）并行求解。
 """
 from __future__ import annotations
-from typing import Dict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple, Union
+import os
 import random
+import time
 import numpy as np
 
-from .types import KnowledgePoint, StudentState, UPKSTParams, Solution
-from .heuristics import build_eta
-from .aco import construct_path
-from .kkt_time import allocate_time_kkt
-from .objective import utility, loss, quality_from_loss, contribution
-from .pheromone import update_pheromone
+from .types import KnowledgePoint, StudentState, UPKSTParams, Solution, BatchReport
+from .heuristics import build_eta, build_eta_vector
+from .point_table import PointTable, as_point_table
+from .aco import construct_path, construct_path_np, construct_paths_batch, transition_weights
+from .graph import PrereqGraph
+from .alloc_cache import AllocationCache, compute_allocation
+from .exact import solve_exact
+from .objective import difficulty_jump_penalty_array, quality_from_loss, quality_from_loss_array
+from .local_search import build_move_tables, improve_path
+from .pheromone import deposit_pheromone, pheromone_entropy
+from .telemetry import IterationEvent, Observer
+from .rng import ant_streams, draw_uniforms
+from .sparse_tau import SparseTau
+from .lazy_tau import LazyTau
+
+
+ENGINES = ("numpy", "batch", "python")
+SOLVERS = ("aco", "exact")
+LOCAL_SEARCH = ("none", "iter_best", "final")
+
+
+def run_upkst(points: Union[Dict[int, KnowledgePoint], PointTable],
+              student: StudentState,
+              params: UPKSTParams,
+              graph: Optional[PrereqGraph] = None,
+              observer: Optional[Observer] = None,
+              tau_init: Optional[Union[np.ndarray, SparseTau]] = None,
+              best_init: Optional[Solution] = None) -> Solution:
+    """
+    points:   Dict[int, KnowledgePoint] 或 PointTable；批量运行时用 table.with_mastery 切换学生最省。
+    graph:    字典输入时可选的预编译先修图。批量运行时各学生只有掌握度不同、先修关系相同，
+              可由调用方编译一次后复用。
+    observer: 可选的每轮回调（见 telemetry.py）；为 None 时不输出、不计时。
+    tau_init: 可选的初始信息素 (n+1, n)（热启动，如上次运行或相似学生的 Solution.tau）；
+              缺省为全 tau0。结束时的信息素放在返回值的 Solution.tau 中
+              （params.sparse_tau=True 时为 SparseTau，可用 to_dense() 展开；
+              lazy_evaporation=True 时已展开为普通矩阵）。
+    best_init: 可选的“历史最优解”（如上一段运行返回的 Solution）：作为初始 best 参与比较，
+              elitist/rank/mmas_global_best 沉积与 patience 判据都以它为起点：
+              停滞计数从 best_init.n_stale 继续，分段续跑时 patience 与一次跑完同样生效。
+    params.solver="exact" 时直接返回可证明最优的路径（stop_reason="exact"），规模超限时回退到 ACO。
+    """
+    if params.engine not in ENGINES:
+        raise ValueError(f"未知的构造引擎 engine={params.engine!r}，可选：{ENGINES}")
+    if params.solver not in SOLVERS:
+        raise ValueError(f"未知的求解器 solver={params.solver!r}，可选：{SOLVERS}")
+    if params.local_search not in LOCAL_SEARCH:
+        raise ValueError(f"未知的局部搜索 local_search={params.local_search!r}，可选：{LOCAL_SEARCH}")
 
+    if params.engine == "python":
+        rng = random.Random(params.seed)
+    else:
+        # 每只蚂蚁一条 SeedSequence 子流，numpy/batch 引擎结果逐位一致
+        streams = ant_streams(params.seed, params.n_ants, params.seed_key)
 
-def run_upkst(points: Dict[int, KnowledgePoint], student: StudentState, params: UPKSTParams) -> Solution:
-    rng = random.Random(params.seed)
+    # 先修图每个点集只编译一次；列顺序按 kid 升序
+    table = as_point_table(points, graph=graph)
+    graph = table.graph
+    idx = graph.idx
+    n = graph.n
 
-    kids = sorted(points.keys())
-    idx = {kid: i for i, kid in enumerate(kids)}
-    n = len(kids)
+    if params.solver == "exact":
+        sol = solve_exact(table, student, params)
+        if sol is not None:
+            return sol
+        # 规模超限：回退到 ACO
+    if params.n_iters < 1:
+        raise ValueError(f"n_iters 至少为 1，实际为 {params.n_iters}")
 
     # tau[from_row, to_col], from_row in [0..n] (n 是 START), to_col in [0..n-1]
-    tau = np.full((n + 1, n), params.tau0, dtype=float)
+    if params.sparse_tau and params.engine == "python":
+        raise ValueError("稀疏信息素（sparse_tau=True）只支持 numpy/batch 引擎")
+    if params.lazy_evaporation and (params.sparse_tau or params.engine == "python"):
+        raise ValueError("惰性挥发（lazy_evaporation=True）只支持稠密信息素与 numpy/batch 引擎")
+    if tau_init is not None and tuple(tau_init.shape) != (n + 1, n):
+        raise ValueError(f"tau_init 形状应为 ({n + 1}, {n})，实际为 {tuple(tau_init.shape)}")
+    if params.sparse_tau:
+        if tau_init is None:
+            tau = SparseTau.full(graph, params.tau0)
+        elif isinstance(tau_init, SparseTau):
+            tau = tau_init.copy()
+        else:
+            tau = SparseTau.from_dense(graph, tau_init, params.tau0)
+        np.clip(tau.data, params.tau_min, params.tau_max, out=tau.data)
+        tau.background = min(max(tau.background, params.tau_min), params.tau_max)
+    elif tau_init is None:
+        tau = np.full((n + 1, n), params.tau0, dtype=float)
+    else:
+        tau = tau_init.to_dense() if isinstance(tau_init, SparseTau) else np.array(tau_init, dtype=float)
+        np.clip(tau, params.tau_min, params.tau_max, out=tau)
+    if params.lazy_evaporation:
+        tau = LazyTau(tau, params.tau_min, params.tau_max)
+
+    eta_vec = build_eta_vector(table, params.eps)
+    kids_arr = np.array(graph.kids)
+    d_vec = table.d
+    if params.engine == "python":
+        # 参考实现沿用字典接口
+        points = points if isinstance(points, dict) else table.to_points()
+        eta = build_eta(points, params.eps)
+
+    # 局部搜索只改变惩罚：beta_jump <= 0 时没有意义
+    moves = build_move_tables(graph, d_vec) if params.local_search != "none" and params.beta_jump > 0 else None
+
+    # 每条路径都覆盖全部知识点：t/λ/U/g 只与点集有关，按学生缓存
+    cache = AllocationCache(table, student, params, check=params.check_alloc_cache) if params.cache_alloc else None
+
+    best = best_init
+    best_cols = best_g = None
+    if best is not None:
+        best_cols = np.array([idx[i] for i in best.path], dtype=np.int64)
+        alloc = cache.get(best_cols) if cache is not None else compute_allocation(table, best_cols, student, params)
+        best_g = alloc.g[best_cols]
 
-    eta = build_eta(points, params.eps)
+    # 遥测：只有设置了 observer 才计时
+    timed = observer is not None
+    perf = time.perf_counter
 
-    best = None
+    # 提前停止状态
+    t_start = perf()
+    stop_reason = "max_iters"
+    best_ref = best.L if best is not None else float("inf")
+    stale = best.n_stale if best is not None else 0
 
     for it in range(1, params.n_iters + 1):
-        sols_for_update = []
+        path_cols = np.empty((params.n_ants, n), dtype=np.int64)
+        g_rows = np.empty((params.n_ants, n), dtype=float)
+        U_vec = np.empty(params.n_ants, dtype=float)
+        allocs = []
+        if timed:
+            t0 = perf()
 
-        for _ in range(params.n_ants):
-            P = construct_path(points, tau, idx, eta, params, rng)
-            t_map, lam = allocate_time_kkt(points, P, student, params)
+        # 1) 构造路径；τ 只在 deposit_pheromone 中变化：本轮所有蚂蚁共享同一转移权重矩阵
+        if params.engine == "python":
+            for ant in range(params.n_ants):
+                P = construct_path(points, tau, idx, eta, params, rng, graph=graph)
+                path_cols[ant] = [idx[i] for i in P]
+        else:
+            weights = transition_weights(tau, eta_vec, params)
+            if params.engine == "batch":
+                path_cols[:] = construct_paths_batch(graph, weights, params.n_ants,
+                                                     uniforms=draw_uniforms(streams, n))
+            else:
+                for ant in range(params.n_ants):
+                    path_cols[ant] = [idx[i] for i in construct_path_np(graph, weights, streams[ant])]
+        if timed:
+            t1 = perf()
 
-            U = utility(points, P, t_map, student, params.k)
-            L = loss(points, P, t_map, student, params.k, params.beta_jump)
-            Q = quality_from_loss(L, params.eps)
-            g_map = {i: contribution(points, i, t_map[i], student, params.k) for i in P}
+        # 2) 时间分配（只依赖点集，走缓存）
+        for ant in range(params.n_ants):
+            cols = path_cols[ant]
+            alloc = cache.get(cols) if cache is not None else compute_allocation(table, cols, student, params)
+            allocs.append(alloc)
+            U_vec[ant] = alloc.U
+            g_rows[ant] = alloc.g[cols]
+        if timed:
+            t2 = perf()
 
-            sols_for_update.append((P, t_map, L, Q, g_map))
+        # 3) 式(2-4)：整轮蚂蚁一次算出惩罚、L 与 Q；只有难度跃迁惩罚依赖顺序
+        L_vec = -U_vec + float(params.beta_jump) * difficulty_jump_penalty_array(d_vec, path_cols)
+        Q_vec = quality_from_loss_array(L_vec, params.eps)
 
-            cand = Solution(path=P, t_map=t_map, U=U, L=L, Q=Q, lam=lam)
-            if best is None or cand.L < best.L:
-                best = cand
+        ant = int(np.argmin(L_vec))  # 并列时取第一只，与逐只比较的 “<” 一致
+        if moves is not None and params.local_search == "iter_best":
+            cols, delta = improve_path(path_cols[ant], moves, params.ls_max_block)
+            if delta < 0:
+                path_cols[ant] = cols
+                g_rows[ant] = allocs[ant].g[cols]
+                L_vec[ant] += float(params.beta_jump) * delta
+                Q_vec[ant] = quality_from_loss(L_vec[ant], params.eps)
+        if best is None or L_vec[ant] < best.L:
+            alloc = allocs[ant]
+            P = kids_arr[path_cols[ant]].tolist()
+            best = Solution(path=P, t_map=alloc.t_map(table, P), U=alloc.U, L=float(L_vec[ant]),
+                            Q=float(Q_vec[ant]), lam=alloc.lam)
+            best_cols, best_g = path_cols[ant].copy(), g_rows[ant].copy()
+        if timed:
+            t_con, t_kkt, t_obj = t1 - t0, t2 - t1, perf() - t2
+            t0 = perf()
+        deposit_pheromone(tau, path_cols, g_rows, Q_vec, params, best=(best_cols, best_g, best.Q))
 
-        update_pheromone(points, tau, idx, sols_for_update, params)
+        if timed:
+            observer(IterationEvent(
+                iteration=it,
+                n_iters=params.n_iters,
+                best_L=best.L,
+                best_U=best.U,
+                best_Q=best.Q,
+                best_lam=best.lam,
+                mean_L=float(L_vec.mean()),
+                entropy=pheromone_entropy(tau),
+                t_construct=t_con,
+                t_kkt=t_kkt,
+                t_objective=t_obj,
+                t_deposit=perf() - t0,
+            ))
 
-        if it % max(1, params.n_iters // 10) == 0 and best is not None:
-            print(f"[Iter {it:>3}/{params.n_iters}] best L={best.L:.6f}  U={best.U:.6f}  Q={best.Q:.6f}  lambda={best.lam:.6g}")
+        # 收敛判据
+        if params.patience > 0:
+            if best.L < best_ref - params.min_delta:
+                best_ref = best.L
+                stale = 0
+            else:
+                stale += 1
+                if stale >= params.patience:
+                    stop_reason = "stagnation"
+                    break
+        if params.entropy_tol > 0 and pheromone_entropy(tau) < params.entropy_tol:
+            stop_reason = "entropy"
+            break
+        if params.time_budget > 0 and perf() - t_start >= params.time_budget:
+            stop_reason = "time_budget"
+            break
+
+    if moves is not None and params.local_search == "final":
+        cols, delta = improve_path(best_cols, moves, params.ls_max_block)
+        if delta < 0:
+            L = best.L + float(params.beta_jump) * delta
+            P = kids_arr[cols].tolist()
+            best = replace(best, path=P, t_map={i: best.t_map[i] for i in P}, L=L,
+                           Q=quality_from_loss(L, params.eps))
+    if isinstance(tau, LazyTau):
+        tau = tau.to_dense()
+    return replace(best, n_iters_run=it, stop_reason=stop_reason, n_stale=stale, tau=tau)
+
+
+def run_upkst_islands(points: Union[Dict[int, KnowledgePoint], PointTable],
+                      student: StudentState,
+                      params: UPKSTParams,
+                      n_colonies: int = 4,
+                      migrate_every: int = 10,
+                      blend: float = 0.0,
+                      workers: Optional[int] = None,
+                      graph: Optional[PrereqGraph] = None) -> Solution:
+    """
+    岛屿模型：n_colonies 个蚁群各自维护 τ，在 workers 个进程中并行运行。
+      - params.n_ants 只蚂蚁平均分到各蚁群（每群 ⌈n_ants / n_colonies⌉ 只），每群跑 params.n_iters 轮，
+        因此墙钟时间约随进程数线性下降；
+      - 每 migrate_every 轮为一个纪元：各蚁群的历史最优解跨纪元保留（run_upkst 的 best_init）；
+        纪元结束时把全局最优路径按 Q·g/Σg 沉积到每个蚁群的 τ（不挥发），
+        blend > 0 时再令 τ_c ← (1-blend)·τ_c + blend·mean_c(τ_c)；
+      - 蚁群 c 第 e 个纪元的随机流为 seed_key + (c, e)，结果只取决于 params.seed 与 n_colonies，
+        与 workers 和调度顺序无关。
+    workers: 进程数，缺省为 CPU 数（不超过 n_colonies）；<= 1 时在本进程内顺序运行。
+    提前停止：各蚁群的停滞计数跨纪元累计（Solution.n_stale），patience 与单蚁群运行同样生效；
+    entropy_tol/time_budget 在每个纪元内检查（time_budget 取剩余时间）。
+    某个纪元内所有蚁群都提前停止时整个运行结束，stop_reason 取全局最优所在蚁群的停止原因。
+    n_iters_run 为各蚁群实际运行轮数（累加各纪元）的最大值。
+    返回全局最优解（并列时取纪元、蚁群编号最小者），tau 为其所在蚁群结束时的信息素。
+    """
+    if n_colonies < 1 or migrate_every < 1:
+        raise ValueError("n_colonies 与 migrate_every 至少为 1")
+    if params.n_iters < 1:
+        raise ValueError(f"n_iters 至少为 1，实际为 {params.n_iters}")
+    if not 0.0 <= blend <= 1.0:
+        raise ValueError(f"blend 应在 [0, 1] 内，实际为 {blend}")
+    if params.engine == "python":
+        raise ValueError("岛屿模型只支持 numpy/batch 引擎（各蚁群需要独立的 numpy 子流）")
+    if workers is None:
+        workers = min(n_colonies, os.cpu_count() or 1)
+
+    table = as_point_table(points, graph=graph)
+    if params.solver == "exact":
+        sol = solve_exact(table, student, params)
+        if sol is not None:
+            return sol
+    colony_params = replace(params, solver="aco", n_ants=-(-params.n_ants // n_colonies))
+
+    # 所有路径覆盖全部知识点：g 与路径无关，迁移沉积只需算一次
+    g_full = compute_allocation(table, np.arange(table.graph.n), student, params).g
+    migrate_params = replace(params, rho=0.0, deposit="all")
+
+    t_start = time.perf_counter()
+    taus: List[Optional[Union[np.ndarray, SparseTau]]] = [None] * n_colonies
+    colony_best: List[Optional[Solution]] = [None] * n_colonies
+    iters_run = [0] * n_colonies
+    best: Optional[Solution] = None
+    best_colony = 0
+    stop_reason = "max_iters"
+    done = 0
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_colony_worker,
+                               initargs=(table, student, colony_params)) if workers > 1 else None
+    if pool is None:
+        _init_colony_worker(table, student, colony_params)
+    try:
+        for epoch in range(-(-params.n_iters // migrate_every)):
+            n_iters = min(migrate_every, params.n_iters - done)
+            budget = 0.0
+            if params.time_budget > 0:
+                budget = params.time_budget - (time.perf_counter() - t_start)
+                if budget <= 0:
+                    stop_reason = "time_budget"
+                    break
+            tasks = [(c, epoch, n_iters, budget, taus[c], colony_best[c]) for c in range(n_colonies)]
+            results = list(pool.map(_run_colony, tasks)) if pool is not None else [_run_colony(t) for t in tasks]
+            for c, sol in enumerate(results):
+                taus[c] = sol.tau
+                colony_best[c] = replace(sol, tau=None)   # τ 单独传递，避免重复序列化
+                iters_run[c] += sol.n_iters_run
+                if best is None or sol.L < best.L:
+                    best, best_colony = sol, c
+            done += n_iters
+
+            # 所有蚁群都提前停止：不再继续
+            if all(sol.stop_reason != "max_iters" for sol in results):
+                stop_reason = results[best_colony].stop_reason
+                break
+            if done >= params.n_iters:
+                break
+
+            # 迁移：全局最优路径强化每个蚁群
+            cols = np.array([table.graph.idx[i] for i in best.path], dtype=np.int64)
+            for c in range(n_colonies):
+                deposit_pheromone(taus[c], cols[None, :], g_full[cols][None, :], np.array([best.Q]),
+                                  migrate_params)
+            if blend > 0:
+                taus = _blend_taus(taus, blend)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     assert best is not None
-    return best
+    return replace(best, n_iters_run=max(iters_run), stop_reason=stop_reason, tau=taus[best_colony])
+
+
+# 岛屿模型 worker 进程内共享的只读数据（由 _init_colony_worker 设置一次）
+_COLONY_TABLE = None
+_COLONY_STUDENT = None
+_COLONY_PARAMS = None
+
+
+def _init_colony_worker(table, student, params):
+    global _COLONY_TABLE, _COLONY_STUDENT, _COLONY_PARAMS
+    _COLONY_TABLE = table
+    _COLONY_STUDENT = student
+    _COLONY_PARAMS = params
+
+
+def _run_colony(task) -> Solution:
+    colony, epoch, n_iters, time_budget, tau, best = task
+    params = replace(_COLONY_PARAMS, n_iters=n_iters, time_budget=time_budget,
+                     seed_key=_COLONY_PARAMS.seed_key + (colony, epoch))
+    return run_upkst(_COLONY_TABLE, _COLONY_STUDENT, params, tau_init=tau, best_init=best)
+
+
+def _blend_taus(taus, blend: float):
+    """τ_c ← (1-blend)·τ_c + blend·mean(τ)；SparseTau 的结构由同一先修图决定，各蚁群相同"""
+    if isinstance(taus[0], SparseTau):
+        mean = np.mean([t.data for t in taus], axis=0)
+        mean_bg = float(np.mean([t.background for t in taus]))
+        return [t.with_data((1.0 - blend) * t.data + blend * mean,
+                            (1.0 - blend) * t.background + blend * mean_bg) for t in taus]
+    mean = np.mean(taus, axis=0)
+    return [(1.0 - blend) * t + blend * mean for t in taus]
+
+
+def _quantize(x: np.ndarray, tol: Optional[float]) -> np.ndarray:
+    if not tol:
+        return x
+    return np.round(x / tol) * tol
+
+
+def run_upkst_batch(points_table: Union[Dict[int, KnowledgePoint], PointTable],
+                    mastery_matrix: np.ndarray,
+                    ability_vector: np.ndarray,
+                    params: UPKSTParams,
+                    mastery_tol: Optional[float] = None,
+                    ability_tol: Optional[float] = None,
+                    observer: Optional[Observer] = None) -> Tuple[List[Solution], BatchReport]:
+    """
+    群体求解：
+      points_table:   基础知识点表（含先修关系），其 mastery 作为缺失值（NaN）的回填
+      mastery_matrix: (S, n)，列按 kid 升序与 points_table 对齐
+      ability_vector: (S,)，各学生 A_s
+      mastery_tol / ability_tol: 可选量化步长；量化后的画像即为实际求解所用的有效画像
+      observer:       透传给每次 run_upkst（每个不同画像求解一次）
+
+    相同有效画像只求解一次再分发给各学生。所有画像使用同一个 params.seed，
+    因此去重不改变结果：同一画像单独求解与去重后求解完全一致。
+    返回 (与学生一一对应的 Solution 列表, BatchReport)。
+    """
+    table = as_point_table(points_table)
+    kids = table.kids
+    fill = table.mastery
+
+    M = np.array(mastery_matrix, dtype=float)
+    A = np.asarray(ability_vector, dtype=float).reshape(-1)
+    if M.ndim != 2 or M.shape[1] != len(kids):
+        raise ValueError(f"mastery_matrix 形状应为 (S, {len(kids)})，实际为 {M.shape}")
+    if M.shape[0] != A.shape[0]:
+        raise ValueError(f"学生数不一致：mastery_matrix 有 {M.shape[0]} 行，ability_vector 有 {A.shape[0]} 个")
+
+    M = np.where(np.isnan(M), fill[None, :], M)
+    M = _quantize(M, mastery_tol)
+    A = _quantize(A, ability_tol)
+
+    # 按有效画像的字节串哈希去重
+    profile_of: Dict[bytes, int] = {}
+    inverse = np.empty(len(A), dtype=np.int64)
+    reps: List[int] = []
+    for s in range(len(A)):
+        key = A[s].tobytes() + M[s].tobytes()
+        u = profile_of.get(key)
+        if u is None:
+            u = profile_of[key] = len(reps)
+            reps.append(s)
+        inverse[s] = u
+
+    unique_sols: List[Solution] = []
+    for s in reps:
+        unique_sols.append(run_upkst(table.with_mastery(M[s]), StudentState(A=float(A[s])), params, observer=observer))
+
+    sols = [unique_sols[u] for u in inverse]
+    return sols, BatchReport(n_students=len(A), n_unique=len(reps))
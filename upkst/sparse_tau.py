@@ -0,0 +1,132 @@
+"""
+稀疏信息素（CSR）：只存可能被走到的转移。
+
+边 i→j 可出现在某条完整拓扑序中（j 紧跟在 i 之后），当且仅当
+  - j 不是 i 的祖先，且 j ≠ i；
+  - 不存在 i → k → … → j 的长度 ≥ 2 的路径（否则 k 必须夹在 i 与 j 之间）。
+START 行只能走到入度为 0 的点。深的先修图中这类转移只占 (n+1)×n 的一小部分。
+
+SparseTau 以 CSR 存这些转移的 τ，其余位置共享同一个“背景值”background：
+稠密模式下这些位置从不被采样，但同样按 (1-ρ) 挥发并裁剪，因此它们始终相等，用一个标量即可还原。
+挥发/沉积/裁剪逐元素与稠密模式相同，构造路径时参与累积和的非零项及其顺序也相同，
+因此给定同样的随机数，稀疏与稠密模式的路径、L 与 τ（to_dense 后）逐位一致。
+"""
+from __future__ import annotations
+from typing import Optional, Tuple
+import numpy as np
+
+from .graph import PrereqGraph
+
+
+def _topo_order(graph: PrereqGraph) -> np.ndarray:
+    """Kahn 拓扑序；先修无法满足的点不在其中"""
+    indeg = graph.indeg.tolist()
+    order = [v for v in range(graph.n) if indeg[v] == 0]
+    for v in order:
+        for u in graph.succ_of[v]:
+            indeg[u] -= 1
+            if indeg[u] == 0:
+                order.append(u)
+    return np.asarray(order, dtype=np.int64)
+
+
+def reachable_transitions(graph: PrereqGraph) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    可达转移的 CSR 结构 (indptr, indices)：第 0..n-1 行为各点，第 n 行为 START，行内列号升序。
+    祖先/后代集合用按位打包的 uint8 行（n × ⌈n/8⌉）计算。
+    """
+    n = graph.n
+    nb = (n + 7) // 8
+    bit = np.zeros((n, nb), dtype=np.uint8)
+    bit[np.arange(n), np.arange(n) // 8] = np.left_shift(1, 7 - np.arange(n) % 8).astype(np.uint8)
+
+    order = _topo_order(graph)
+    anc = np.zeros((n, nb), dtype=np.uint8)
+    for v in order.tolist():
+        for u in graph.succ_of[v]:
+            anc[u] |= anc[v] | bit[v]
+    desc = np.zeros((n, nb), dtype=np.uint8)
+    desc2 = np.zeros((n, nb), dtype=np.uint8)   # 经过至少一个中间点可达的后代
+    for v in order[::-1].tolist():
+        for c in graph.succ_of[v]:
+            desc[v] |= desc[c] | bit[c]
+            desc2[v] |= desc[c]
+
+    blocked = np.unpackbits(anc | bit | desc2, axis=1, count=n).astype(bool)
+    rows = [np.flatnonzero(~blocked[v]) for v in range(n)]
+    rows.append(np.flatnonzero(graph.indeg == 0))
+
+    indptr = np.zeros(n + 2, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(r) for r in rows])
+    indices = np.concatenate(rows).astype(np.int64) if indptr[-1] else np.zeros(0, dtype=np.int64)
+    return indptr, indices
+
+
+class SparseTau:
+    """
+    (n+1)×n 的 τ：indptr/indices 为 reachable_transitions 的 CSR 结构，data 为对应的 τ 值，
+    其余位置统一为 background。indptr/indices 在拷贝间共享（只读）。
+    """
+
+    def __init__(self, n: int, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray,
+                 background: float, row_of: Optional[np.ndarray] = None, _keys: Optional[np.ndarray] = None):
+        self.n = n
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.background = float(background)
+        self.row_of = row_of if row_of is not None else np.repeat(np.arange(n + 1), np.diff(indptr))
+        self._keys = _keys if _keys is not None else self.row_of * n + indices
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.n + 1, self.n
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @classmethod
+    def full(cls, graph: PrereqGraph, value: float) -> "SparseTau":
+        indptr, indices = reachable_transitions(graph)
+        return cls(graph.n, indptr, indices, np.full(len(indices), float(value)), value)
+
+    @classmethod
+    def from_dense(cls, graph: PrereqGraph, tau: np.ndarray, background: float) -> "SparseTau":
+        out = cls.full(graph, background)
+        out.data = np.asarray(tau, dtype=float)[out.row_of, out.indices].copy()
+        return out
+
+    def to_dense(self) -> np.ndarray:
+        tau = np.full(self.shape, self.background)
+        tau[self.row_of, self.indices] = self.data
+        return tau
+
+    def copy(self) -> "SparseTau":
+        return self.with_data(self.data.copy(), self.background)
+
+    def with_data(self, data: np.ndarray, background: float) -> "SparseTau":
+        """同一稀疏结构、不同数值（如转移权重）"""
+        return SparseTau(self.n, self.indptr, self.indices, data, background, self.row_of, self._keys)
+
+    def positions(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """(row, col) 在 data 中的下标；不可达的转移抛 ValueError"""
+        key = np.asarray(rows, dtype=np.int64) * self.n + np.asarray(cols, dtype=np.int64)
+        pos = np.searchsorted(self._keys, key)
+        pos_c = np.minimum(pos, len(self._keys) - 1)
+        if len(key) and (len(self._keys) == 0 or np.any(self._keys[pos_c] != key)):
+            raise ValueError("路径包含不可达的转移（先修图与稀疏信息素的结构不一致）")
+        return pos_c
+
+    def rows_dense(self, rows: np.ndarray) -> np.ndarray:
+        """取若干行并展开为稠密 (len(rows), n)，不可达位置为 0（供 batch 引擎使用）"""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lens = self.indptr[rows + 1] - starts
+        m = int(lens.sum())
+        out = np.zeros((len(rows), self.n))
+        if m:
+            r = np.repeat(np.arange(len(rows)), lens)
+            offs = np.arange(m) - np.repeat(np.cumsum(lens) - lens, lens) + np.repeat(starts, lens)
+            out[r, self.indices[offs]] = self.data[offs]
+        return out
@@ -0,0 +1,68 @@
+"""
+运行遥测：run_upkst 每轮迭代结束时向 observer 回调发送一个 IterationEvent。
+- 默认不设 observer：不输出、不计时、不算熵，开销接近 0；
+- print_progress：与旧版相同的每 n_iters/10 轮一行的进度输出；
+- JsonlTraceWriter：把每轮事件写成 JSONL（一个学生一个文件），便于离线分析热点。
+"""
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from typing import Callable, Optional
+import json
+
+
+@dataclass(frozen=True)
+class IterationEvent:
+    iteration: int
+    n_iters: int
+    # 历史最优解
+    best_L: float
+    best_U: float
+    best_Q: float
+    best_lam: float
+    # 本轮蚂蚁的平均损失与信息素归一化熵
+    mean_L: float
+    entropy: float
+    # 本轮各阶段耗时（秒）
+    t_construct: float
+    t_kkt: float
+    t_objective: float
+    t_deposit: float
+
+
+Observer = Callable[[IterationEvent], None]
+
+
+def print_progress(event: IterationEvent) -> None:
+    """每 n_iters/10 轮打印一行进度（旧版 run_upkst 的默认输出）"""
+    if event.iteration % max(1, event.n_iters // 10) == 0:
+        print(f"[Iter {event.iteration:>3}/{event.n_iters}] best L={event.best_L:.6f}  U={event.best_U:.6f}  "
+              f"Q={event.best_Q:.6f}  lambda={event.best_lam:.6g}")
+
+
+class JsonlTraceWriter:
+    """
+    把每轮事件追加写入 JSONL 文件；student_id 给定时写入每一行。
+    用法：
+        with JsonlTraceWriter("trace/S0001.jsonl", student_id="S0001") as tr:
+            run_upkst(points, student, params, observer=tr)
+    """
+
+    def __init__(self, path: str, student_id: Optional[str] = None):
+        self.path = path
+        self.student_id = student_id
+        self._f = open(path, "w", encoding="utf-8")
+
+    def __call__(self, event: IterationEvent) -> None:
+        rec = asdict(event)
+        if self.student_id is not None:
+            rec = {"student_id": self.student_id, **rec}
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "JsonlTraceWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,6 +1,6 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -49,6 +49,13 @@ class UPKSTParams:
     # 信息素挥发系数（式2-15/2-18）
     rho: float = 0.1
 
+    # 信息素沉积策略："all" | "elitist" | "rank" | "mmas"（见 pheromone.py）
+    deposit: str = "all"
+    elite_weight: float = 5.0        # elitist：历史最优的额外倍数
+    rank_w: int = 6                  # rank：参与排名沉积的数量 w
+    mmas_global_best: bool = False   # mmas：用历史最优（否则本轮最优）沉积
+    deposit_start: bool = False      # 是否强化 START→首个点的边
+
     # 迭代与蚂蚁数量
     n_ants: int = 30
     n_iters: int = 80
@@ -56,14 +63,45 @@ class UPKSTParams:
     # 其他
     eps: float = 1e-9
     seed: int = 42
+    # 随机子流的附加键：numpy/batch 引擎第 a 只蚂蚁用 SeedSequence(seed, spawn_key=seed_key + (a,))（见 rng.py）
+    seed_key: Tuple[int, ...] = ()
+
+    # 路径构造引擎："numpy"（转移权重矩阵 + numpy Generator）| "batch"（整轮蚂蚁同步批量构造）
+    #             | "python"（逐元素参考实现）
+    engine: str = "numpy"
+
+    # 求解器："aco" | "exact"（down-set 位掩码 DP，见 exact.py；超出下述规模时回退到 ACO）
+    solver: str = "aco"
+    exact_max_n: int = 24            # 知识点数上限
+    exact_max_states: int = 100000   # down-set 数上限（0 表示不限）
+
+    # 局部搜索（见 local_search.py）："none" | "iter_best"（每轮最优蚂蚁，改进后的路径参与沉积）| "final"
+    local_search: str = "none"
+    ls_max_block: int = 3            # 块移动的最大长度（1 即相邻交换）
 
     # 初始信息素
     tau0: float = 1.0
 
+    # 稀疏信息素：只存先修图下可能出现的转移（见 sparse_tau.py），仅 numpy/batch 引擎；结果与稠密模式一致
+    sparse_tau: bool = False
+    # 惰性挥发：τ 以缩放形式保存，每轮只更新被沉积的位置（见 lazy_tau.py），仅稠密 numpy/batch 引擎
+    lazy_evaporation: bool = False
+
     # 信息素裁剪（防止数值爆炸/消失）
     tau_min: float = 1e-6
     tau_max: float = 1e6
 
+    # 提前停止（均为 0 表示关闭，跑满 n_iters）
+    patience: int = 0          # best L 连续 patience 轮改善不超过 min_delta 则停止
+    min_delta: float = 0.0
+    entropy_tol: float = 0.0   # 信息素归一化熵低于该阈值则停止（分布已集中）
+    time_budget: float = 0.0   # 墙钟时间预算（秒）
+
+    # KKT 分配缓存（每条路径点集相同，t/λ/U/g 只需算一次）
+    cache_alloc: bool = True
+    # 校验缓存结果与不走缓存的结果一致（调试用，会抵消缓存收益）
+    check_alloc_cache: bool = False
+
 
 @dataclass(frozen=True)
 class Solution:
@@ -74,3 +112,27 @@ class Solution:
     L: float
     Q: float
     lam: float
+    # 实际运行的迭代轮数与停止原因："max_iters" | "stagnation" | "entropy" | "time_budget" | "exact"
+    n_iters_run: int = 0
+    stop_reason: str = ""
+    # 结束时 best L 已连续未改善（超过 min_delta）的轮数（patience > 0 时统计）；作为 best_init 续跑时沿用
+    n_stale: int = 0
+    # 结束时的信息素矩阵 (n+1, n)（sparse_tau 时为 SparseTau），可作为下一次 run_upkst 的 tau_init（精确求解时为 None）
+    tau: Optional[Any] = field(default=None, repr=False, compare=False)
+
+
+@dataclass(frozen=True)
+class BatchReport:
+    """run_upkst_batch 的去重统计"""
+    n_students: int
+    n_unique: int
+
+    @property
+    def dedup_ratio(self) -> float:
+        """被去重省掉的求解比例：1 - n_unique / n_students"""
+        return 1.0 - self.n_unique / self.n_students if self.n_students else 0.0
+
+    @property
+    def speedup(self) -> float:
+        """求解次数的缩减倍数：n_students / n_unique"""
+        return self.n_students / self.n_unique if self.n_unique else 1.0